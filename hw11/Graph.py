@@ -1,11 +1,33 @@
 from __future__ import annotations
 
+import contextlib
+import functools
+import inspect
+import itertools
 import math
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
 import typing
-from collections import deque
-from collections.abc import Collection, Hashable, Iterable, Iterator
-from dataclasses import dataclass
-from typing import Generic, Protocol, TypeVar
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Callable, Collection, Hashable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import (
+    Concatenate,
+    Generic,
+    Literal,
+    NamedTuple,
+    ParamSpec,
+    Protocol,
+    TypeVar,
+    overload,
+)
 
 # can you tell I'm a fan of type-driven development?
 _T_contra = TypeVar("_T_contra", contravariant=True)
@@ -15,6 +37,12 @@ _IT_co = TypeVar("_IT_co", covariant=True)
 _PT_co = TypeVar("_PT_co", covariant=True, bound='Comparable')
 _VT = TypeVar("_VT", bound=Hashable)
 _WT = TypeVar("_WT", bound='Comparable')
+_RT = TypeVar("_RT")
+_GT = TypeVar("_GT", bound='Graph[typing.Any, typing.Any]')
+_P = ParamSpec("_P")
+# for methods that make a new graph with different types than `self`'s
+_NVT = TypeVar("_NVT", bound=Hashable)
+_NWT = TypeVar("_NWT", bound='Comparable')
 
 class Comparable(Protocol):
     def __lt__(self: _T_contra, other: _T_contra, /) -> bool:
@@ -40,16 +68,22 @@ class _PriorityQueue(Collection[_IT], Generic[_IT, _PT]):
             iterable = ()
         self._tree = [_PQEntry(entry[0], entry[1]) for entry in iterable]
         
-        for i in range(len(self._tree) // 2):
+        # heapify bottom-up, otherwise the upper levels aren't fixed properly
+        for i in reversed(range(len(self._tree) // 2)):
             self._siftdown(i)
     
+    def _swap(self, i: int, j: int) -> None:
+        """Swap the entries at indices `i` and `j`."""
+        self._tree[i], self._tree[j] = self._tree[j], self._tree[i]
+    
     def _siftup(self, i: int) -> None:
         """Bubble up the item at index `i`."""
         # Complexity: O(log n)
         while i > 0:
             parent = (i - 1) // 2
-            if self._tree[i] < self._tree[parent]:
-                self._tree[i], self._tree[parent] = self._tree[parent], self._tree[i]
+            if not self._tree[i] < self._tree[parent]:
+                break
+            self._swap(i, parent)
             i = parent
     
     def _siftdown(self, i: int) -> None:
@@ -64,8 +98,9 @@ class _PriorityQueue(Collection[_IT], Generic[_IT, _PT]):
             else:
                 child = left
             
-            if self._tree[child] < self._tree[i]:
-                self._tree[i], self._tree[child] = self._tree[child], self._tree[i]
+            if not self._tree[child] < self._tree[i]:
+                break
+            self._swap(i, child)
             
             i = child
     
@@ -86,6 +121,16 @@ class _PriorityQueue(Collection[_IT], Generic[_IT, _PT]):
         # Complexity: O(1)
         return self._tree[0].item
     
+    def front_priority(self) -> _PT:
+        """Get the priority of the item with the highest priority."""
+        # Complexity: O(1)
+        return self._tree[0].priority
+    
+    def nth_priority(self, n: int) -> _PT:
+        """Get the `n`th highest priority (counting from 1), without popping."""
+        # Complexity: O(m log m), where m is the number of items
+        return sorted(entry.priority for entry in self._tree)[n - 1]
+    
     def pop(self) -> _IT:
         """Remove and return the item with the highest priority."""
         # Complexity: O(log n)
@@ -112,25 +157,197 @@ class _PriorityQueue(Collection[_IT], Generic[_IT, _PT]):
                 return
         raise ValueError(f"{item} is not in the priority queue")
 
+class _IndexedPriorityQueue(_PriorityQueue[_IT, _PT]):
+    # same heap as above, but also keeps track of where each item lives in `_tree`, so
+    # that looking up an item doesn't need a linear scan. the catch is that items have
+    # to be hashable and unique.
+    # invariant: self._tree[self._index[item]].item == item
+    _index: dict[_IT, int]
+    
+    def __init__(self, iterable: Iterable[tuple[_IT, _PT]] | None = None, /) -> None:
+        """Create an indexed priority queue from an iterable of unique items.
+
+        Raises
+        ------
+        ValueError
+            If any item appears more than once.
+        """
+        entries = list(iterable or ())
+        self._index = {item: i for i, (item, _) in enumerate(entries)}
+        if len(self._index) != len(entries):
+            raise ValueError("items in an indexed priority queue must be unique")
+        super().__init__(entries)
+    
+    def _swap(self, i: int, j: int) -> None:
+        """Swap the entries at indices `i` and `j`, keeping the index up to date."""
+        super()._swap(i, j)
+        self._index[self._tree[i].item] = i
+        self._index[self._tree[j].item] = j
+    
+    def __contains__(self, __x: object) -> bool:
+        # Complexity: O(1)
+        try:
+            return __x in self._index
+        except TypeError: # unhashable things are never in here
+            return False
+    
+    def pop(self) -> _IT:
+        """Remove and return the item with the highest priority."""
+        # Complexity: O(log n)
+        result = self._tree[0]
+        del self._index[result.item]
+        last = self._tree.pop()
+        if self._tree:
+            self._tree[0] = last
+            self._index[last.item] = 0
+            self._siftdown(0)
+        return result.item
+    
+    def push(self, item: _IT, priority: _PT, /) -> None:
+        """Add an item to the priority queue.
+
+        Raises
+        ------
+        ValueError
+            If the item is already in the priority queue.
+        """
+        # Complexity: O(log n)
+        if item in self._index:
+            raise ValueError(f"{item} is already in the priority queue")
+        self._index[item] = len(self._tree)
+        self._tree.append(_PQEntry(item, priority))
+        self._siftup(len(self._tree) - 1)
+    
+    def update(self, item: _IT, priority: _PT, /) -> None:
+        """Update the priority of an item in the priority queue."""
+        # Complexity: O(log n)
+        if item not in self._index:
+            raise ValueError(f"{item} is not in the priority queue")
+        i = self._index[item]
+        self._tree[i] = _PQEntry(item, priority)
+        self._siftup(i)
+        self._siftdown(self._index[item])
+    
+    def remove(self, item: _IT, /) -> None:
+        """Remove an item from the priority queue."""
+        # Complexity: O(log n)
+        if item not in self._index:
+            raise ValueError(f"{item} is not in the priority queue")
+        i = self._index.pop(item)
+        last = self._tree.pop()
+        if i < len(self._tree):
+            self._tree[i] = last
+            self._index[last.item] = i
+            self._siftup(i)
+            self._siftdown(self._index[last.item])
+
+
+class _CountingPriorityQueue(_PriorityQueue[_IT, _PT]):
+    # a priority queue that tallies what it does into a SearchStats. this is its own
+    # class (rather than an `if` in the normal one) so that searches that don't ask
+    # for stats don't pay anything for them
+    _stats: SearchStats
+    
+    def __init__(
+        self,
+        stats: SearchStats,
+        iterable: Iterable[tuple[_IT, _PT]] | None = None,
+        /
+    ) -> None:
+        """Create a priority queue that counts its operations into `stats`.
+        
+        Any initial items count as pushes.
+        """
+        super().__init__(iterable)
+        self._stats = stats
+        stats.heap_pushes += len(self._tree)
+        stats.peak_heap_size = max(stats.peak_heap_size, len(self._tree))
+    
+    def pop(self) -> _IT:
+        self._stats.heap_pops += 1
+        return super().pop()
+    
+    def push(self, item: _IT, priority: _PT, /) -> None:
+        super().push(item, priority)
+        self._stats.heap_pushes += 1
+        self._stats.peak_heap_size = max(self._stats.peak_heap_size, len(self._tree))
+    
+    def update(self, item: _IT, priority: _PT, /) -> None:
+        self._stats.heap_updates += 1
+        super().update(item, priority)
+
+class _CountingIndexedPriorityQueue(
+    _CountingPriorityQueue[_IT, _PT],
+    _IndexedPriorityQueue[_IT, _PT]
+):
+    pass
 
-class _EdgeWeightDict(dict[frozenset[_VT], _WT], Generic[_VT, _WT]):
+# how many bits of an edge key each end's id gets
+_ID_BITS = 32
+
+def _edge_key(i: int, j: int, /) -> int:
+    """Pack the interned ids of an edge's two ends into one int, in either order."""
+    return (i << _ID_BITS | j) if i <= j else (j << _ID_BITS | i)
+
+class _EdgeWeightDict(dict[int, _WT], Generic[_VT, _WT]):
     # okay yes i know this class doesn't obey the liskov substitution
     # principle, but given that i dont intend this to be a real dict subtype
     # i dont really care, ESPECIALLY since its a private class
+    # the actual keys are `_edge_key`s of the graph's interned vertex ids, since an
+    # int is way smaller than a frozenset of the two vertices
+    _ids: dict[_VT, int]
+    _interned: list[_VT]
+    
+    def __init__(self, ids: dict[_VT, int], interned: list[_VT]) -> None:
+        super().__init__()
+        self._ids = ids
+        self._interned = interned
+    
+    def key(self, u: _VT, v: _VT) -> int:
+        """Return the key of the edge (u, v), whether or not it's in the graph.
+        
+        Raises
+        ------
+        KeyError
+            If either vertex isn't in the graph.
+        """
+        return _edge_key(self._ids[u], self._ids[v])
+    
+    # these take keys that were already packed by `_edge_key`, for the batch methods
+    # of `Graph` that have the ids on hand anyway
+    
+    def contains_key(self, key: int) -> bool:
+        """Return whether the edge with the given key is in the graph."""
+        return super().__contains__(key)
+    
+    def set_key(self, key: int, weight: _WT) -> None:
+        """Set the weight of the edge with the given key."""
+        super().__setitem__(key, weight)
+    
+    def update_keys(self, items: Iterable[tuple[int, _WT]]) -> None:
+        """Set the weights of many edges, given as `(key, weight)` pairs."""
+        super().update(items)
+    
+    def delete_key(self, key: int) -> None:
+        """Delete the edge with the given key."""
+        super().__delitem__(key)
     
     def __contains__( # pyright: ignore[reportIncompatibleMethodOverride]
         self,
         edge: tuple[_VT, _VT]
     ) -> bool:
         """Return whether the edge (u, v) is in the graph."""
-        return super().__contains__(frozenset(edge))
+        try:
+            return super().__contains__(self.key(*edge))
+        except (KeyError, TypeError):
+            return False
     
     def __getitem__( # pyright: ignore[reportIncompatibleMethodOverride]
         self,
         edge: tuple[_VT, _VT]
     ) -> _WT:
         """Return the weight of the edge (u, v)."""
-        return super().__getitem__(frozenset(edge))
+        return super().__getitem__(self.key(*edge))
     
     def __setitem__( # pyright: ignore[reportIncompatibleMethodOverride]
         self,
@@ -138,19 +355,264 @@ class _EdgeWeightDict(dict[frozenset[_VT], _WT], Generic[_VT, _WT]):
         weight: _WT
     ) -> None:
         """Return the weight of the edge (u, v)."""
-        return super().__setitem__(frozenset(edge), weight)
+        return super().__setitem__(self.key(*edge), weight)
     
     def __delitem__( # pyright: ignore[reportIncompatibleMethodOverride]
         self,
         edge: tuple[_VT, _VT]
     ) -> None:
         """Delete the edge (u, v)."""
-        return super().__delitem__(frozenset(edge))
+        return super().__delitem__(self.key(*edge))
+    
+    def __iter__(self) -> Iterator[tuple[_VT, _VT]]: # pyright: ignore[reportIncompatibleMethodOverride]
+        return (edge for edge, _ in self.items())
+    
+    def keys(self) -> Iterator[tuple[_VT, _VT]]: # pyright: ignore[reportIncompatibleMethodOverride]
+        """Iterate over every edge once."""
+        return iter(self)
+    
+    def items(self) -> Iterator[tuple[tuple[_VT, _VT], _WT]]: # pyright: ignore[reportIncompatibleMethodOverride]
+        """Iterate over every edge once, along with its weight."""
+        interned, mask = self._interned, (1 << _ID_BITS) - 1
+        for key, weight in super().items():
+            yield (interned[key >> _ID_BITS], interned[key & mask]), weight
+
+class _EdgeWeightView(Generic[_VT, _WT]):
+    # enough of the _EdgeWeightDict interface for the read-only Graph methods, but
+    # looked up in adjacency dicts rather than stored separately
+    _adjacency: dict[_VT, dict[_VT, _WT]]
+    
+    def __init__(self, adjacency: dict[_VT, dict[_VT, _WT]]) -> None:
+        self._adjacency = adjacency
+    
+    def __contains__(self, edge: tuple[_VT, _VT]) -> bool:
+        """Return whether the edge (u, v) is in the graph."""
+        u, v = edge
+        return u in self._adjacency and v in self._adjacency[u]
+    
+    def __getitem__(self, edge: tuple[_VT, _VT]) -> _WT:
+        """Return the weight of the edge (u, v)."""
+        u, v = edge
+        return self._adjacency[u][v]
+    
+    def __iter__(self) -> Iterator[tuple[_VT, _VT]]:
+        return (edge for edge, _ in self.items())
+    
+    def __len__(self) -> int:
+        # Complexity: O(V)
+        loops = sum(1 for v, neighbors in self._adjacency.items() if v in neighbors)
+        return (sum(map(len, self._adjacency.values())) + loops) // 2
+    
+    def items(self) -> Iterator[tuple[tuple[_VT, _VT], _WT]]:
+        """Iterate over every edge once, along with its weight."""
+        # Complexity: O(V + E)
+        done: set[_VT] = set()
+        for u, neighbors in self._adjacency.items():
+            for v, weight in neighbors.items():
+                if v not in done:
+                    yield (u, v), weight
+            done.add(u)
+    
+    def values(self) -> Iterator[_WT]:
+        """Iterate over the weight of every edge once."""
+        return (weight for _, weight in self.items())
+
+Heuristic = Callable[[_VT, _VT], float]
+
+def _zero_heuristic(v: object, goal: object, /) -> float:
+    return 0
+
+def euclidean_distance(v: Sequence[float], goal: Sequence[float], /) -> float:
+    """Return the straight-line distance between two points."""
+    return math.dist(v, goal)
+
+def manhattan_distance(v: Sequence[float], goal: Sequence[float], /) -> float:
+    """Return the sum of the distances between two points along each axis."""
+    return sum(abs(a - b) for a, b in zip(v, goal, strict=True))
+
+class BFSReport(NamedTuple):
+    edges_checked: int
+    top_down_edges_checked: int
+    bottom_up_levels: int
+    
+    @property
+    def edges_saved(self) -> int:
+        """How many fewer edges were looked at than in a plain top-down search."""
+        return self.top_down_edges_checked - self.edges_checked
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+@dataclass(eq=False)
+class SearchStats:
+    # filled in by the algorithms that take a `stats` argument. everything adds on to
+    # what's already there, so one of these can be passed to several calls to get
+    # the totals
+    vertices_settled: int = 0
+    edges_scanned: int = 0
+    # edges that made something better (a shorter distance, or a candidate tree edge)
+    edges_relaxed: int = 0
+    heap_pushes: int = 0
+    heap_pops: int = 0
+    heap_updates: int = 0
+    peak_heap_size: int = 0
+    neighbors_calls: int = 0
+    phase_seconds: dict[str, float] = field(default_factory=dict[str, float])
+    
+    def add_time(self, phase: str, since: float) -> float:
+        """Add the time since `since` (from `time.perf_counter`) to `phase`.
+        
+        Returns the current time, which can be passed as `since` for the next phase.
+        """
+        now = time.perf_counter()
+        self.phase_seconds[phase] = self.phase_seconds.get(phase, 0.0) + now - since
+        return now
+    
+    @property
+    def total_seconds(self) -> float:
+        """The total time spent across every phase."""
+        return sum(self.phase_seconds.values())
+
+@dataclass(frozen=True)
+class EdgeFileOptions:
+    # how `Graph.from_edge_file` reads its file. none of these change the graph
+    # that comes out, only how it gets loaded
+    # memory-map the file instead of reading it normally
+    use_mmap: bool = False
+    # print how many edges were loaded, and how fast, to stderr
+    verbose: bool = False
+
+class ResultCache(Generic[_RT]):
+    # an LRU cache of algorithm results, which throws everything away as soon as it's
+    # asked about a different version of the graph than the one its results are from.
+    # `Graph.enable_cache` uses one of these, and it's public so that other front ends
+    # to the graph (like the route server) can keep their results the same way
+    _results: OrderedDict[Hashable, _RT]
+    _version: int
+    maxsize: int | None
+    hits: int
+    misses: int
+    
+    def __init__(self, maxsize: int | None) -> None:
+        self._results = OrderedDict()
+        self._version = 0
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._results)
+    
+    def get(self, key: Hashable, version: int) -> _RT:
+        """Return the cached result for `key`, or raise `KeyError` if there is none."""
+        # Complexity: O(1)
+        if version != self._version:
+            self._results.clear()
+            self._version = version
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self._results.move_to_end(key)
+        self.hits += 1
+        return result
+    
+    def put(self, key: Hashable, version: int, result: _RT) -> None:
+        """Cache `result` for `key`, evicting the least recently used one if full."""
+        # Complexity: O(1)
+        if version != self._version:
+            self._results.clear()
+            self._version = version
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if self.maxsize is not None and len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+class SpanningTree(NamedTuple, Generic[_VT, _WT]):
+    vertices: set[_VT]
+    edges: list[tuple[_VT, _VT, _WT]]
+    weight: _WT | int
+
+class _DisjointSet(Generic[_VT]):
+    # a union-find forest, with path compression and union by rank
+    _parent: dict[_VT, _VT]
+    _rank: dict[_VT, int]
+    
+    def __init__(self, items: Iterable[_VT]) -> None:
+        self._parent = {x: x for x in items}
+        self._rank = dict.fromkeys(self._parent, 0)
+    
+    def find(self, x: _VT) -> _VT:
+        """Return the representative of the set containing `x`."""
+        # Complexity: O(alpha(n)) amortized
+        root = x
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[x] != root:
+            self._parent[x], x = root, self._parent[x]
+        return root
+    
+    def union(self, x: _VT, y: _VT) -> bool:
+        """Merge the sets containing `x` and `y`. Return False if they already were."""
+        # Complexity: O(alpha(n)) amortized
+        x, y = self.find(x), self.find(y)
+        if x == y:
+            return False
+        if self._rank[x] < self._rank[y]:
+            x, y = y, x
+        self._parent[y] = x
+        if self._rank[x] == self._rank[y]:
+            self._rank[x] += 1
+        return True
+
+def path_from_tree(tree: dict[_VT, _VT], start: _VT, end: _VT) -> list[_VT]:
+    """Walk `tree` backwards from `end` to `start`, and return the path in order.
+    
+    `tree` maps each vertex to the one before it on the path from `start`, like the
+    trees returned by the single-source algorithms.
+    """
+    path = [end]
+    while path[-1] != start:
+        path.append(tree[path[-1]])
+    path.reverse()
+    return path
+
+# how many times bigger than the graph `Graph._dial` will let the number of
+# distances it walks through get, before it gives up and uses a heap
+_DIAL_MAX_SCAN = 64
 
 class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
     # invariant: set(_edges.keys()).issubset(_vertices)
-    _vertices: set[_VT]
+    # invariant: _adjacency[u][v] == _adjacency[v][u] == _edge_weights[(u, v)]
+    # `_vertices` isn't stored separately, it's a live view of the vertices in `_ids`
+    # (or in `_adjacency`, for a `GraphSnapshot`)
+    _vertices: Collection[_VT]
     _edge_weights: _EdgeWeightDict[_VT, _WT]
+    _adjacency: dict[_VT, dict[_VT, _WT]]
+    # the interning table: every vertex gets a dense int id when it's added, which
+    # `_edge_weights` uses for its keys. everything else stores the one vertex object
+    # kept in `_interned`, rather than whatever equal copy it was given, so that each
+    # vertex (which might be a long string) is only in memory once. `GraphSnapshot`
+    # doesn't have any of these, so only the methods that change the graph (which it
+    # doesn't allow) may use them
+    # invariant: _interned[_ids[v]] is v for every vertex v
+    _ids: dict[_VT, int]
+    _interned: list[_VT]
+    # ids of removed vertices, to be given out again
+    _free_ids: list[int]
+    # bumped every time the graph changes, so that cached results can be thrown out
+    _version: int
+    _cache: ResultCache[typing.Any] | None
+    # copy-on-write bookkeeping for `snapshot`. `_adjacency_shared` is whether the
+    # outer adjacency dict is shared with a snapshot, and `_owned` is the vertices whose
+    # inner dicts have been copied since the last snapshot (None if there's never been
+    # a snapshot, so that everything is ours)
+    _adjacency_shared: bool
+    _owned: set[_VT] | None
     
     def __init__(
         self,
@@ -174,11 +636,18 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
             If any edge has a node that is not in `vertices`, or if
             any edge has a negative weight.
         """
-        self._vertices = set(vertices or ())
-        self._edge_weights = _EdgeWeightDict()
+        self._ids = {v: i for i, v in enumerate(dict.fromkeys(vertices or ()))}
+        self._interned = list(self._ids)
+        self._free_ids = []
+        self._vertices = self._ids.keys()
+        self._edge_weights = _EdgeWeightDict(self._ids, self._interned)
+        self._adjacency = {v: {} for v in self._interned}
+        self._version = 0
+        self._cache = None
+        self._adjacency_shared = False
+        self._owned = None
         if edge_weights is not None:
-            for edge, weight in edge_weights:
-                self.add_edge(*edge, weight)
+            self.add_edges(edge_weights)
     
     def __contains__(self, value: object | _VT | tuple[_VT, _VT]) -> bool:
         """Return whether the given vertex or edge is in the graph."""
@@ -196,9 +665,40 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
         """Return an iterator over all vertices in the graph, in no particular order."""
         return iter(self._vertices)
     
+    @property
+    def num_edges(self) -> int:
+        """The number of edges in the graph, counting each self-loop once."""
+        return len(self._edge_weights)
+    
+    def _unshare(self, vertices: Iterable[_VT]) -> None:
+        """Copy whatever adjacency dicts of `vertices` are shared with a snapshot."""
+        # Complexity: O(1) if there's never been a snapshot, otherwise O(V) for the
+        # first change after a snapshot, plus O(deg(v)) the first time each v changes
+        if self._owned is None:
+            return
+        if self._adjacency_shared:
+            self._adjacency = dict(self._adjacency)
+            self._adjacency_shared = False
+        adjacency, owned = self._adjacency, self._owned
+        for v in vertices:
+            if v not in owned:
+                adjacency[v] = dict(adjacency[v])
+                owned.add(v)
+        if len(owned) >= len(adjacency): # nothing is shared anymore
+            self._owned = None
+    
     def add_vertex(self, vertex: _VT) -> None:
         """Add a vertex to the graph."""
-        self._vertices.add(vertex)
+        if vertex not in self._ids:
+            self._unshare(())
+            if self._free_ids:
+                self._ids[vertex] = self._free_ids.pop()
+                self._interned[self._ids[vertex]] = vertex
+            else:
+                self._ids[vertex] = len(self._interned)
+                self._interned.append(vertex)
+            self._adjacency[vertex] = {}
+            self._version += 1
     
     def remove_vertex(self, v: _VT) -> None:
         """Remove a vertex from the graph.
@@ -208,10 +708,22 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
         ValueError
             If the vertex is not in the graph.
         """
-        self._vertices.remove(v)
-        for u in self._vertices:
-            if (u, v) in self._edge_weights:
-                del self._edge_weights[(u, v)]
+        # Complexity: O(deg(v))
+        if v not in self._vertices:
+            raise ValueError(f"{v} is not in the graph")
+        v = self._interned[self._ids[v]]
+        self._unshare(self._adjacency[v])
+        for u in self._adjacency[v]:
+            del self._edge_weights[(u, v)]
+        for u in self._adjacency.pop(v):
+            if u != v:
+                del self._adjacency[u][v]
+        i = self._ids.pop(v)
+        self._interned[i] = None # pyright: ignore[reportArgumentType, reportCallIssue]
+        self._free_ids.append(i)
+        if self._owned is not None:
+            self._owned.discard(v)
+        self._version += 1
     
     def add_edge(self, u: _VT, v: _VT, weight: _WT) -> None:
         """Add an edge with the given weight between the given nodes.
@@ -227,7 +739,13 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
             raise ValueError(f"{v} is not in the graph")
         if weight < 0:
             raise ValueError("weight must be nonnegative")
-        self._edge_weights[(u, v)] = weight
+        i, j = self._ids[u], self._ids[v]
+        u, v = self._interned[i], self._interned[j]
+        self._unshare((u, v))
+        self._edge_weights.set_key(_edge_key(i, j), weight)
+        self._adjacency[u][v] = weight
+        self._adjacency[v][u] = weight
+        self._version += 1
     
     def remove_edge(self, u: _VT, v: _VT) -> None:
         """Remove the edge between the given nodes.
@@ -237,7 +755,222 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
         ValueError
             If the edge is not in the graph.
         """
+        if (u, v) not in self._edge_weights:
+            raise ValueError(f"({u}, {v}) is not in the graph")
         del self._edge_weights[(u, v)]
+        u, v = self._interned[self._ids[u]], self._interned[self._ids[v]]
+        self._unshare((u, v))
+        del self._adjacency[u][v]
+        self._adjacency[v].pop(u, None)
+        self._version += 1
+    
+    def add_edges(self, edge_weights: Iterable[tuple[tuple[_VT, _VT], _WT]]) -> int:
+        """Add many edges at once, in the same format as the constructor takes.
+        
+        All the edges are checked before any of them are added, so if this raises,
+        then the graph is left unchanged.
+
+        Returns
+        -------
+        int
+            The number of edges that were given.
+
+        Raises
+        ------
+        ValueError
+            If any edge has a node that is not in the graph, or if any edge has a
+            negative weight.
+        """
+        # Complexity: O(k) for k edges
+        ids = self._ids
+        batch: list[tuple[int, int, _WT]] = []
+        for (u, v), weight in edge_weights:
+            i, j = ids.get(u), ids.get(v)
+            if i is None:
+                raise ValueError(f"{u} is not in the graph")
+            if j is None:
+                raise ValueError(f"{v} is not in the graph")
+            if weight < 0:
+                raise ValueError("weight must be nonnegative")
+            batch.append((i, j, weight))
+        
+        interned = self._interned
+        self._unshare(interned[i] for i, _, _ in batch)
+        self._unshare(interned[j] for _, j, _ in batch)
+        self._edge_weights.update_keys(
+            (_edge_key(i, j), weight) for i, j, weight in batch
+        )
+        adjacency = self._adjacency
+        for i, j, weight in batch:
+            u, v = interned[i], interned[j]
+            adjacency[u][v] = weight
+            adjacency[v][u] = weight
+        self._version += 1
+        return len(batch)
+    
+    def remove_edges(self, edges: Iterable[tuple[_VT, _VT]]) -> int:
+        """Remove many edges at once.
+        
+        All the edges are checked before any of them are removed, so if this raises,
+        then the graph is left unchanged. Listing an edge more than once (in either
+        direction) is fine.
+
+        Returns
+        -------
+        int
+            The number of distinct edges that were removed.
+
+        Raises
+        ------
+        ValueError
+            If any edge is not in the graph.
+        """
+        # Complexity: O(k) for k edges
+        ids, interned = self._ids, self._interned
+        batch: dict[int, tuple[_VT, _VT]] = {}
+        for u, v in edges:
+            try:
+                i, j = ids[u], ids[v]
+            except KeyError:
+                raise ValueError(f"({u}, {v}) is not in the graph") from None
+            key = _edge_key(i, j)
+            if not self._edge_weights.contains_key(key):
+                raise ValueError(f"({u}, {v}) is not in the graph")
+            batch[key] = (interned[i], interned[j])
+        
+        self._unshare(itertools.chain.from_iterable(batch.values()))
+        adjacency = self._adjacency
+        for key, (u, v) in batch.items():
+            self._edge_weights.delete_key(key)
+            del adjacency[u][v]
+            adjacency[v].pop(u, None)
+        self._version += 1
+        return len(batch)
+    
+    @overload
+    @classmethod
+    def from_edge_file(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        default_weight: float = ...,
+        options: EdgeFileOptions | None = ...
+    ) -> Graph[str, float]:
+        ...
+    
+    @overload
+    @classmethod
+    def from_edge_file(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        vertex_type: Callable[[str], _NVT],
+        default_weight: float = ...,
+        options: EdgeFileOptions | None = ...
+    ) -> Graph[_NVT, float]:
+        ...
+    
+    @overload
+    @classmethod
+    def from_edge_file(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        weight_type: Callable[[str], _NWT],
+        default_weight: _NWT = ...,
+        options: EdgeFileOptions | None = ...
+    ) -> Graph[str, _NWT]:
+        ...
+    
+    @overload
+    @classmethod
+    def from_edge_file(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        vertex_type: Callable[[str], _NVT],
+        weight_type: Callable[[str], _NWT],
+        default_weight: _NWT = ...,
+        options: EdgeFileOptions | None = ...
+    ) -> Graph[_NVT, _NWT]:
+        ...
+    
+    @classmethod
+    def from_edge_file(
+        cls,
+        path: str | os.PathLike[str],
+        *,
+        vertex_type: Callable[[str], typing.Any] = str,
+        weight_type: Callable[[str], typing.Any] = float,
+        default_weight: typing.Any = 1,
+        options: EdgeFileOptions | None = None
+    ) -> Graph[typing.Any, typing.Any]:
+        """Load a graph from a text file listing its edges.
+        
+        Each line of the file should be `u v` or `u v weight`, separated by whitespace
+        and/or commas. Blank lines and lines starting with `#` are ignored. Every
+        vertex that appears in an edge is added to the graph.
+
+        Parameters
+        ----------
+        path : str | os.PathLike[str]
+            The file to read.
+        vertex_type : Callable[[str], _VT]
+            How to turn each vertex in the file into an actual vertex.
+        weight_type : Callable[[str], _WT]
+            How to turn each weight in the file into an actual weight.
+        default_weight : _WT
+            The weight of edges that don't list one.
+        options : EdgeFileOptions | None
+            How to read the file. If None, then the defaults are used.
+
+        Raises
+        ------
+        ValueError
+            If a line has the wrong number of fields, or any weight is negative.
+        """
+        if options is None:
+            options = EdgeFileOptions()
+        start_time = time.perf_counter()
+        
+        vertices: set[typing.Any] = set()
+        edge_weights: list[tuple[tuple[typing.Any, typing.Any], typing.Any]] = []
+        with open(path, 'rb') as file, contextlib.ExitStack() as stack:
+            lines: Iterable[bytes] = file
+            if options.use_mmap and os.fstat(file.fileno()).st_size > 0:
+                mapped = stack.enter_context(
+                    mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                )
+                lines = iter(mapped.readline, b'')
+            
+            for line_number, line in enumerate(lines, start=1):
+                fields = line.replace(b',', b' ').split()
+                if not fields or fields[0].startswith(b'#'):
+                    continue
+                if len(fields) not in (2, 3):
+                    raise ValueError(
+                        f"{path}:{line_number}: expected `u v [weight]`, got {line!r}"
+                    )
+                u, v = vertex_type(fields[0].decode()), vertex_type(fields[1].decode())
+                weight = (
+                    weight_type(fields[2].decode()) if len(fields) == 3
+                    else default_weight
+                )
+                vertices.add(u)
+                vertices.add(v)
+                edge_weights.append(((u, v), weight))
+        
+        graph = cls(vertices)
+        graph.add_edges(edge_weights)
+        
+        if options.verbose:
+            elapsed = max(time.perf_counter() - start_time, 1e-9)
+            print(
+                f"loaded {len(edge_weights)} edges from {path} in {elapsed:.3f}s "
+                f"({len(edge_weights) / elapsed:,.0f} edges/sec)",
+                file=sys.stderr,
+            )
+        return graph
     
     def weight(self, u: _VT, v: _VT) -> _WT:
         """Return the weight of the edge between the given nodes.
@@ -259,12 +992,65 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
         ValueError
             If the vertex is not in the graph.
         """
+        # Complexity: O(deg(v))
         if v not in self._vertices:
             raise ValueError(f"{v} is not in the graph")
-        for u in self._vertices:
-            if (u, v) in self._edge_weights:
-                yield (u, self._edge_weights[(u, v)])
+        return iter(self._adjacency[v].items())
     
+    def enable_cache(self, maxsize: int | None = 128) -> None:
+        """Start memoizing the results of the single-source algorithms.
+        
+        This affects `paths_with_fewest_edges`, `shortest_paths`, and
+        `minimum_spanning_tree`. Results are keyed by the algorithm and the start
+        vertex, and are all thrown away as soon as the graph is changed. Note that
+        cached results are returned as-is, so they should not be modified.
+
+        Parameters
+        ----------
+        maxsize : int | None
+            The maximum number of results to keep, with the least recently used ones
+            being thrown away first. If None, then the cache can grow without bound.
+        """
+        self._cache = ResultCache[typing.Any](maxsize)
+    
+    def disable_cache(self) -> None:
+        """Stop memoizing results, and throw away everything that has been cached."""
+        self._cache = None
+    
+    def cache_info(self) -> CacheInfo | None:
+        """Return statistics about the result cache, or None if it isn't enabled."""
+        if self._cache is None:
+            return None
+        return CacheInfo(
+            self._cache.hits, self._cache.misses, self._cache.maxsize, len(self._cache)
+        )
+    
+    @staticmethod
+    def _cached(
+        method: Callable[Concatenate[_GT, _P], _RT]
+    ) -> Callable[Concatenate[_GT, _P], _RT]:
+        """Memoize a single-source graph algorithm, if the graph has caching enabled."""
+        # arguments are bound to the signature before making the key, so that
+        # `f(v)`, `f(start=v)`, and `f(v, <the default>)` all share one entry
+        signature = inspect.signature(method)
+        
+        @functools.wraps(method)
+        def wrapper(self: _GT, /, *args: _P.args, **kwargs: _P.kwargs) -> _RT:
+            # a cache hit wouldn't fill in the stats, so asking for them skips the cache
+            if self._cache is None or kwargs.get('stats') is not None:
+                return method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key = (method.__name__, tuple(bound.arguments.items())[1:])
+            try:
+                return self._cache.get(key, self._version)
+            except KeyError:
+                result = method(self, *args, **kwargs)
+                self._cache.put(key, self._version, result)
+                return result
+        return wrapper
+    
+    @_cached
     def paths_with_fewest_edges(
         self,
         start: _VT
@@ -311,14 +1097,112 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
         
         return prev, num_edges
     
+    def fewest_edges_path(self, start: _VT, goal: _VT) -> list[_VT]:
+        """Find a path from `start` to `goal` with as few edges as possible.
+        
+        Unlike `paths_with_fewest_edges`, this runs a breadth-first search from both
+        ends at once, each time expanding a whole level of whichever side has the
+        smaller frontier, and stops as soon as the two searches meet. That way it only
+        visits about O(b^(d/2)) vertices instead of O(b^d), for branching factor b
+        and distance d.
+
+        Returns
+        -------
+        list[_VT]
+            The vertices along the path (including `start` and `goal`), or `[]` if
+            there is no path.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        if goal not in self._vertices:
+            raise ValueError(f"{goal} is not in the graph")
+        if start == goal:
+            return [start]
+        
+        # index 0 is the search from `start`, index 1 is the search from `goal`
+        prev: tuple[dict[_VT, _VT], dict[_VT, _VT]] = ({start: start}, {goal: goal})
+        depth: tuple[dict[_VT, int], dict[_VT, int]] = ({start: 0}, {goal: 0})
+        frontiers: tuple[list[_VT], list[_VT]] = ([start], [goal])
+        
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            other = 1 - side
+            next_frontier, best = self._bidirectional_bfs_step(
+                frontiers[side], prev[side], depth[side], depth[other]
+            )
+            
+            if best is not None:
+                _, u, v = best
+                near = path_from_tree(prev[side], (start, goal)[side], u)
+                far = path_from_tree(prev[other], (start, goal)[other], v)
+                path = near + far[::-1]
+                return path if side == 0 else path[::-1]
+            
+            if side == 0:
+                frontiers = (next_frontier, frontiers[1])
+            else:
+                frontiers = (frontiers[0], next_frontier)
+        
+        return []
+    
+    def _bidirectional_bfs_step(
+        self,
+        frontier: list[_VT],
+        prev: dict[_VT, _VT],
+        depth: dict[_VT, int],
+        other_depth: dict[_VT, int]
+    ) -> tuple[list[_VT], tuple[int, _VT, _VT] | None]:
+        """Expand one whole level of one side of a bidirectional breadth-first search.
+        
+        Returns the next frontier, and (if the level touched the other side's search)
+        the shortest meeting point found, as its total path length along with the
+        vertex on this side and the vertex on the other side.
+        """
+        best: tuple[int, _VT, _VT] | None = None
+        next_frontier: list[_VT] = []
+        for u in frontier:
+            for v in self._adjacency[u]:
+                if v in other_depth:
+                    length = depth[u] + 1 + other_depth[v]
+                    if best is None or length < best[0]:
+                        best = (length, u, v)
+                if v not in depth:
+                    prev[v] = u
+                    depth[v] = depth[u] + 1
+                    next_frontier.append(v)
+        return next_frontier, best
+    
+    @_cached
     def shortest_paths(
         self: Graph[_VT, float] | Graph[_VT, int],
-        start: _VT
+        start: _VT,
+        engine: Literal['heap', 'buckets'] = 'heap',
+        *,
+        stats: SearchStats | None = None
     ) -> tuple[dict[_VT, _VT], dict[_VT, float]]:
         """Find the shortest paths from `start` to all other vertices in the graph.
         
         This function internally uses Dijkstra's algorithm. As such, if no path exists
         to a given vertex from `start`, then that vertex will not be in the mapping.
+        
+        With `engine='buckets'`, this instead uses Dial's algorithm, which keeps a
+        circular array of buckets (one per possible distance, modulo the largest edge
+        weight) rather than a heap. This only works if all the weights are integers,
+        and takes O(V + E + D) time with no heap overhead at all, where D (at most V
+        times the largest weight) is the distance to the furthest vertex, since every
+        distance up to that has its bucket looked at. That's only a win when the
+        weights are small, so if V times the largest weight is more than 64 times
+        V + E, then this quietly uses the heap instead, which keeps it O(V + E) in
+        the worst case.
+        
+        If `stats` is given, it's filled in with counts of what the search did and how
+        long each phase ('initialize' and 'search') took. This skips the result
+        cache, and only works with the heap engine.
 
         Returns
         -------
@@ -332,17 +1216,46 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
         Raises
         ------
         ValueError
-            If the `start` vertex is not in the graph.
+            If the `start` vertex is not in the graph, if `engine` isn't one of the
+            above, if `engine` is 'buckets' and some weight isn't an integer, or if
+            `engine` is 'buckets' and `stats` is given.
         """
         if start not in self._vertices:
             raise ValueError(f"{start} is not in the graph")
-        
+        if stats is not None:
+            if engine != 'heap':
+                raise ValueError("stats can only be collected with the heap engine")
+            return self._dijkstra(start, stats)
+        if engine == 'buckets':
+            return self._dial(start)
+        if engine != 'heap':
+            raise ValueError(f"unknown shortest path engine {engine!r}")
+        return self._dijkstra(start)
+    
+    def _dijkstra(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        stats: SearchStats | None = None
+    ) -> tuple[dict[_VT, _VT], dict[_VT, float]]:
+        # the loop itself never looks at `stats`, so that plain searches pay nothing
+        # for it. the heap counts its own operations (each update is a relaxed edge),
+        # and since every vertex starts in the heap, every vertex gets settled and
+        # has its neighbors scanned, so the rest can be filled in afterwards
+        phase_start = 0.0 if stats is None else time.perf_counter()
         tree: dict[_VT, _VT] = {}
         
         distances: dict[_VT, float] = {v: math.inf for v in self._vertices}
         distances[start] = 0
         
-        to_visit = _PriorityQueue[_VT, float]((v, distances[v]) for v in self._vertices)
+        initial = ((v, distances[v]) for v in self._vertices)
+        to_visit = (
+            _IndexedPriorityQueue[_VT, float](initial) if stats is None
+            else _CountingIndexedPriorityQueue[_VT, float](stats, initial)
+        )
+        updates_before = 0
+        if stats is not None:
+            updates_before = stats.heap_updates
+            phase_start = stats.add_time('initialize', phase_start)
         
         while to_visit:
             v = to_visit.pop()
@@ -352,52 +1265,2421 @@ class Graph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
                     tree[u] = v
                     to_visit.update(u, distances[u])
         
+        if stats is not None:
+            stats.vertices_settled += len(distances)
+            stats.neighbors_calls += len(distances)
+            stats.edges_scanned += sum(map(len, self._adjacency.values()))
+            stats.edges_relaxed += stats.heap_updates - updates_before
+            stats.add_time('search', phase_start)
         return tree, distances
     
-    def minimum_spanning_tree(
+    def _check_sources(self, sources: Iterable[_VT]) -> set[_VT]:
+        sources = set(sources)
+        if not sources:
+            raise ValueError("there must be at least one source")
+        for source in sources:
+            if source not in self._vertices:
+                raise ValueError(f"{source} is not in the graph")
+        return sources
+    
+    def multi_source_paths_with_fewest_edges(
         self,
-        start: _VT
-    ) -> tuple[dict[_VT, _VT], dict[_VT, _WT]]:
-        """Find the minimum spanning tree of the graph, starting from the given vertex.
+        sources: Iterable[_VT]
+    ) -> tuple[dict[_VT, _VT], dict[_VT, int], dict[_VT, _VT]]:
+        """Find the paths with the fewest edges from the closest of several sources.
         
-        This algorithm internally uses Prim's algorithm. As such, if the graph is not
-        fully connected, then the returned tree will not be a spanning tree.
+        This is a single breadth-first search started from all of the sources at once,
+        so it's as fast as `paths_with_fewest_edges` from just one of them. Vertices
+        that no source can reach are not in any of the mappings.
 
         Returns
         -------
-        tuple[Mapping[_VT, _VT], Mapping[_VT, float]]
-            A tuple of two mappings.
-            The first mapping maps each vertex to the vertex that comes before it in the
-            minimum spanning tree.
-            The second mapping maps each vertex to the weight of the edge between it and
-            the vertex that comes before it in the minimum spanning tree.
+        tuple[dict[_VT, _VT], dict[_VT, int], dict[_VT, _VT]]
+            A tuple of three mappings. The first maps each vertex to the vertex that
+            comes before it on its path (sources are not in it). The second maps each
+            vertex to the number of edges in its path. The third maps each vertex to
+            the source its path starts at.
 
         Raises
         ------
         ValueError
-            If the `start` vertex is not in the graph.
+            If there are no sources, or any of them are not in the graph.
         """
-        if start not in self._vertices:
-            raise ValueError(f"{start} is not in the graph")
+        sources = self._check_sources(sources)
         
-        tree: dict[_VT, _VT] = {start: start}
+        prev: dict[_VT, _VT] = {}
+        num_edges: dict[_VT, int] = dict.fromkeys(sources, 0)
+        nearest: dict[_VT, _VT] = {source: source for source in sources}
+        node_queue: deque[_VT] = deque(sources)
         
-        edge_queue = _PriorityQueue[tuple[_VT, _VT], _WT]()
-        for n, weight in self.neighbors(start):
-            edge_queue.push((start, n), weight)
+        while node_queue:
+            u = node_queue.popleft()
+            for v in self._adjacency[u]:
+                if v not in num_edges:
+                    prev[v] = u
+                    num_edges[v] = num_edges[u] + 1
+                    nearest[v] = nearest[u]
+                    node_queue.append(v)
         
-        while edge_queue:
-            u, v = edge_queue.pop()
-            if v not in tree:
-                tree[v] = u
-                for n, weight in self.neighbors(v):
-                    edge_queue.push((v, n), weight)
+        return prev, num_edges, nearest
+    
+    def multi_source_shortest_paths(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        sources: Iterable[_VT]
+    ) -> tuple[dict[_VT, _VT], dict[_VT, float], dict[_VT, _VT]]:
+        """Find the shortest paths to every vertex from the closest of several sources.
         
-        del tree[start]
+        This is a single run of Dijkstra's algorithm started from all of the sources
+        at once, so it's as fast as `shortest_paths` from just one of them. Vertices
+        that no source can reach are not in any of the mappings.
+
+        Returns
+        -------
+        tuple[dict[_VT, _VT], dict[_VT, float], dict[_VT, _VT]]
+            A tuple of three mappings. The first maps each vertex to the vertex that
+            comes before it on its shortest path (sources are not in it). The second
+            maps each vertex to the distance to its nearest source. The third maps
+            each vertex to its nearest source.
+
+        Raises
+        ------
+        ValueError
+            If there are no sources, or any of them are not in the graph.
+        """
+        sources = self._check_sources(sources)
+        
+        tree: dict[_VT, _VT] = {}
+        distances: dict[_VT, float] = dict.fromkeys(sources, 0)
+        nearest: dict[_VT, _VT] = {source: source for source in sources}
+        settled: set[_VT] = set()
+        to_visit = _IndexedPriorityQueue[_VT, float]((s, 0) for s in sources)
+        
+        while to_visit:
+            v = to_visit.pop()
+            settled.add(v)
+            for u, weight in self._adjacency[v].items():
+                if u in settled:
+                    continue
+                distance = distances[v] + weight
+                if u not in distances:
+                    to_visit.push(u, distance)
+                elif distance < distances[u]:
+                    to_visit.update(u, distance)
+                else:
+                    continue
+                distances[u] = distance
+                tree[u] = v
+                nearest[u] = nearest[v]
         
-        return tree, {v: self.weight(v, tree[v]) for v in tree}
+        return tree, distances, nearest
     
-    # this shit is dumb
-    fewest_flights = paths_with_fewest_edges
-    shortest_path = shortest_paths
-    minimum_salt = minimum_spanning_tree
+    def within_distance(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        radius: float
+    ) -> Iterator[tuple[_VT, float]]:
+        """Lazily generate the vertices at most `radius` away from `start`.
+        
+        This runs Dijkstra's algorithm, but never puts anything further than `radius`
+        in the queue, so the work done only depends on the size of the neighborhood.
+
+        Returns
+        -------
+        Iterator[tuple[_VT, float]]
+            Each vertex (starting with `start` itself) and its distance from `start`,
+            closest first.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        return self._within_distance(start, radius)
+    
+    def _within_distance(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        radius: float
+    ) -> Iterator[tuple[_VT, float]]:
+        if radius < 0:
+            return
+        distances: dict[_VT, float] = {start: 0}
+        settled: set[_VT] = set()
+        to_visit = _IndexedPriorityQueue[_VT, float]([(start, 0)])
+        
+        while to_visit:
+            v = to_visit.pop()
+            settled.add(v)
+            yield v, distances[v]
+            for u, weight in self._adjacency[v].items():
+                distance = distances[v] + weight
+                if u in settled or distance > radius:
+                    continue
+                if u not in distances:
+                    distances[u] = distance
+                    to_visit.push(u, distance)
+                elif distance < distances[u]:
+                    distances[u] = distance
+                    to_visit.update(u, distance)
+    
+    def k_hop(self, start: _VT, k: int) -> Iterator[tuple[_VT, int]]:
+        """Lazily generate the vertices at most `k` edges away from `start`.
+        
+        This runs a breadth-first search, but never goes past `k` edges from `start`.
+
+        Returns
+        -------
+        Iterator[tuple[_VT, int]]
+            Each vertex (starting with `start` itself) and the fewest number of edges
+            between it and `start`, closest first.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        return self._k_hop(start, k)
+    
+    def _k_hop(self, start: _VT, k: int) -> Iterator[tuple[_VT, int]]:
+        if k < 0:
+            return
+        num_edges: dict[_VT, int] = {start: 0}
+        node_queue: deque[_VT] = deque([start])
+        
+        while node_queue:
+            u = node_queue.popleft()
+            yield u, num_edges[u]
+            if num_edges[u] == k:
+                continue
+            for v in self._adjacency[u]:
+                if v not in num_edges:
+                    num_edges[v] = num_edges[u] + 1
+                    node_queue.append(v)
+    
+    def _dial(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT
+    ) -> tuple[dict[_VT, _VT], dict[_VT, float]]:
+        """Run Dial's algorithm (Dijkstra's algorithm with a bucket queue).
+        
+        Raises
+        ------
+        ValueError
+            If any weight isn't an int.
+        """
+        # every edge is in `_edge_weights` once, so this is one pass over the weights
+        # that doesn't copy anything
+        max_weight = 0
+        for weight in self._edge_weights.values():
+            if type(weight) is not int:
+                raise ValueError("the 'buckets' engine needs integer weights")
+            max_weight = max(max_weight, weight)
+        
+        # walking through every distance costs up to O(V * max weight), so only do it
+        # when that's still O(V + E)
+        num_vertices = len(self._vertices)
+        graph_size = num_vertices + len(self._edge_weights)
+        if max_weight * num_vertices > _DIAL_MAX_SCAN * graph_size:
+            return self._dijkstra(start)
+        
+        # every vertex in the queue is at most `max_weight` further than the closest
+        # one, so bucket `d % num_buckets` only ever has vertices at distance `d`, plus
+        # stale entries for vertices that got closer after they were put there
+        num_buckets = max_weight + 1
+        buckets: list[list[_VT]] = [[] for _ in range(num_buckets)]
+        buckets[0].append(start)
+        queued = 1
+        
+        # every weight was just checked to be an int
+        adjacency = typing.cast('dict[_VT, dict[_VT, int]]', self._adjacency)
+        tree: dict[_VT, _VT] = {}
+        distances: dict[_VT, int] = {start: 0}
+        settled: set[_VT] = set()
+        
+        distance = 0
+        while queued:
+            # skip straight past empty buckets. something is always queued within
+            # `max_weight` of here, so this can't go around forever
+            while not buckets[distance % num_buckets]:
+                distance += 1
+            bucket = buckets[distance % num_buckets]
+            while bucket:
+                v = bucket.pop()
+                queued -= 1
+                if v in settled or distances[v] != distance:
+                    continue
+                settled.add(v)
+                for u, weight in adjacency[v].items():
+                    new_distance = distance + weight
+                    if u not in distances or new_distance < distances[u]:
+                        distances[u] = new_distance
+                        tree[u] = v
+                        buckets[new_distance % num_buckets].append(u)
+                        queued += 1
+            distance += 1
+        
+        return tree, {v: distances.get(v, math.inf) for v in self._vertices}
+    
+    def shortest_path_between(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        goal: _VT,
+        *,
+        bidirectional: bool = False
+    ) -> tuple[list[_VT], float]:
+        """Find the shortest path from `start` to `goal`.
+        
+        Unlike `shortest_paths`, this only runs Dijkstra's algorithm until `goal` is
+        settled, and only puts vertices in the queue once they're actually reached.
+        If `bidirectional` is set, then it searches from both ends at once (always
+        expanding the smaller frontier), and stops once the two searches can't find
+        anything better than the best path through where they've met.
+
+        Returns
+        -------
+        tuple[list[_VT], float]
+            The vertices along the shortest path (including `start` and `goal`), and
+            the total weight of that path. If there is no path, then this is
+            `([], math.inf)`.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        if goal not in self._vertices:
+            raise ValueError(f"{goal} is not in the graph")
+        
+        if start == goal:
+            return [start], 0
+        if bidirectional:
+            return self._bidirectional_dijkstra(start, goal)
+        
+        # dijkstra's algorithm is just A* without any heuristic
+        path, cost, _ = self.a_star(start, goal, _zero_heuristic)
+        return path, cost
+    
+    def a_star(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        goal: _VT,
+        heuristic: Heuristic[_VT]
+    ) -> tuple[list[_VT], float, int]:
+        """Find the shortest path from `start` to `goal` using the A* search algorithm.
+        
+        `heuristic(v, goal)` should never overestimate the actual distance from `v` to
+        `goal`, otherwise the returned path might not be the shortest one. For graphs
+        whose vertices are points, and whose edge weights are at least the distance
+        between the points, `euclidean_distance` and `manhattan_distance` work.
+        
+        If the heuristic is admissible but not consistent, then vertices may be
+        expanded more than once.
+
+        Returns
+        -------
+        tuple[list[_VT], float, int]
+            The vertices along the shortest path (including `start` and `goal`), the
+            total weight of that path, and how many vertices were expanded (popped off
+            the queue) during the search. If there is no path, then the path is empty
+            and the weight is `math.inf`.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        if goal not in self._vertices:
+            raise ValueError(f"{goal} is not in the graph")
+        
+        tree: dict[_VT, _VT] = {}
+        distances: dict[_VT, float] = {start: 0}
+        to_visit = _IndexedPriorityQueue[_VT, float]([(start, heuristic(start, goal))])
+        expanded = 0
+        
+        while to_visit:
+            v = to_visit.pop()
+            expanded += 1
+            if v == goal:
+                path = path_from_tree(tree, start, goal)
+                return path, distances[goal], expanded
+            for u, weight in self.neighbors(v):
+                distance = distances[v] + weight
+                if distance < distances.get(u, math.inf):
+                    distances[u] = distance
+                    tree[u] = v
+                    if u in to_visit:
+                        to_visit.update(u, distance + heuristic(u, goal))
+                    else:
+                        to_visit.push(u, distance + heuristic(u, goal))
+        
+        return [], math.inf, expanded
+    
+    def shortest_simple_paths(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        goal: _VT,
+        *,
+        max_paths: int | None = None
+    ) -> Iterator[tuple[list[_VT], float]]:
+        """Lazily generate the loopless paths from `start` to `goal`, shortest first.
+        
+        This uses Yen's algorithm, with Lawler's improvement of only looking for
+        detours at or after the point where each path branched off of the path it was
+        found from. Each detour (spur path) is found with an A* search that ignores the
+        vertices and edges that would give a loop or a repeat. Its heuristic is the
+        distance to `goal` in the whole graph, from one Dijkstra search backwards from
+        `goal` at the start. When `max_paths` is given, those distances also rule out
+        detours that can't beat enough of the candidates already found.
+
+        Parameters
+        ----------
+        start : _VT
+            The vertex every path starts at.
+        goal : _VT
+            The vertex every path ends at.
+        max_paths : int | None
+            If given, then no more than this many paths will be asked for in total, so
+            candidate paths that can't be among the first `max_paths` are thrown away
+            to save memory. If None, then no candidates are ever thrown away.
+
+        Returns
+        -------
+        Iterator[tuple[list[_VT], float]]
+            Each path, along with its total weight, in order of increasing weight.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        if goal not in self._vertices:
+            raise ValueError(f"{goal} is not in the graph")
+        return self._yen(start, goal, max_paths)
+    
+    def k_shortest_paths(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        goal: _VT,
+        k: int
+    ) -> list[tuple[list[_VT], float]]:
+        """Return the (up to) `k` shortest loopless paths from `start` to `goal`.
+        
+        See `shortest_simple_paths`.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the graph, or if `k` is negative.
+        """
+        if k < 0:
+            raise ValueError("k must be nonnegative")
+        paths = self.shortest_simple_paths(start, goal, max_paths=k)
+        return list(itertools.islice(paths, k))
+    
+    def _yen(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        goal: _VT,
+        max_paths: int | None
+    ) -> Iterator[tuple[list[_VT], float]]:
+        if start == goal:
+            yield [start], 0
+            return
+        # the shortest distance from every vertex to `goal`, ignoring everything the
+        # spur searches ban. that makes it a lower bound on every detour
+        tree, to_goal = self._dijkstra(goal)
+        if to_goal[start] == math.inf:
+            return
+        path = path_from_tree(tree, goal, start)[::-1]
+        
+        found: list[list[_VT]] = []
+        seen: set[tuple[_VT, ...]] = {tuple(path)}
+        # items are (path, index of the vertex where it branched off of its parent)
+        candidates = _PriorityQueue[tuple[tuple[_VT, ...], int], float]()
+        candidates.push((tuple(path), 0), to_goal[start])
+        
+        while candidates:
+            best_cost = candidates.front_priority()
+            path_tuple, branch = candidates.pop()
+            path = list(path_tuple)
+            found.append(path)
+            yield path, best_cost
+            
+            # a detour that costs more than this can't be one of the paths asked for
+            limit = math.inf
+            if max_paths is not None and len(candidates) >= max_paths - len(found) > 0:
+                limit = candidates.nth_priority(max_paths - len(found))
+            
+            spur_paths = self._spur_paths(path, branch, found, to_goal, limit)
+            for candidate, i, candidate_cost in spur_paths:
+                if candidate not in seen:
+                    seen.add(candidate)
+                    candidates.push((candidate, i), candidate_cost)
+            
+            if max_paths is not None:
+                candidates = self._trim_candidates(
+                    candidates, max_paths - len(found)
+                )
+    
+    def _spur_paths(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        path: list[_VT],
+        branch: int,
+        found: list[list[_VT]],
+        to_goal: dict[_VT, float],
+        limit: float
+    ) -> Iterator[tuple[tuple[_VT, ...], int, float]]:
+        """Generate the detours from `path` at or after index `branch`.
+        
+        Each one is a new path to the same goal, along with the index of the vertex
+        where it branches off of `path`, and its total cost. None of them go through
+        the same vertex twice or are in `found`, but they may repeat each other.
+        Detours that must cost more than `limit` aren't searched for at all, going by
+        the distances `to_goal` in the whole graph.
+        """
+        goal = path[-1]
+        # cost of getting from `start` to each vertex of `path`
+        prefix_costs: list[float] = [0]
+        for u, v in itertools.pairwise(path):
+            prefix_costs.append(prefix_costs[-1] + self._adjacency[u][v])
+        
+        for i in range(branch, len(path) - 1):
+            spur, root = path[i], path[:i + 1]
+            if prefix_costs[i] + to_goal[spur] > limit:
+                continue
+            
+            # don't find any path that's already been found, or go back through
+            # the part of the path before the spur
+            banned_next = {
+                other[i + 1]
+                for other in found
+                if len(other) > i + 1 and other[:i + 1] == root
+            }
+            banned_vertices = set(root[:-1])
+            
+            spur_path, spur_cost = self._spur_search(
+                spur, goal, to_goal, banned_vertices, banned_next
+            )
+            if spur_path:
+                yield tuple(root[:-1] + spur_path), i, prefix_costs[i] + spur_cost
+    
+    @staticmethod
+    def _trim_candidates(
+        candidates: _PriorityQueue[_IT, float],
+        limit: int
+    ) -> _PriorityQueue[_IT, float]:
+        """Only keep the best `limit` candidates, once there are twice that many."""
+        # waiting for there to be twice as many keeps this O(1) amortized per push
+        if len(candidates) <= 2 * max(limit, 1):
+            return candidates
+        kept = _PriorityQueue[_IT, float]()
+        for _ in range(limit):
+            priority = candidates.front_priority()
+            kept.push(candidates.pop(), priority)
+        return kept
+    
+    def _spur_search(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        spur: _VT,
+        goal: _VT,
+        to_goal: dict[_VT, float],
+        banned_vertices: Collection[_VT],
+        banned_next: Collection[_VT]
+    ) -> tuple[list[_VT], float]:
+        """Find the shortest path from `spur` to `goal` that avoids the banned parts.
+        
+        The path doesn't go through any of `banned_vertices`, and its first step isn't
+        to any of `banned_next`. This is A* search, with the distances `to_goal` in the
+        whole graph as the heuristic. Banning things only makes paths longer, so it
+        never overestimates, and it's consistent, so each vertex is expanded once.
+        """
+        tree: dict[_VT, _VT] = {}
+        distances: dict[_VT, float] = {spur: 0}
+        expanded: set[_VT] = set()
+        to_visit = _IndexedPriorityQueue[_VT, float]([(spur, to_goal[spur])])
+        
+        while to_visit:
+            v = to_visit.pop()
+            if v == goal:
+                return path_from_tree(tree, spur, goal), distances[goal]
+            expanded.add(v)
+            for u, weight in self.neighbors(v):
+                if u in expanded or u in banned_vertices or to_goal[u] == math.inf:
+                    continue
+                if v == spur and u in banned_next:
+                    continue
+                distance = distances[v] + weight
+                if distance < distances.get(u, math.inf):
+                    distances[u] = distance
+                    tree[u] = v
+                    if u in to_visit:
+                        to_visit.update(u, distance + to_goal[u])
+                    else:
+                        to_visit.push(u, distance + to_goal[u])
+        
+        return [], math.inf
+    
+    def _bidirectional_dijkstra(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        start: _VT,
+        goal: _VT,
+        banned_vertices: Collection[_VT] = frozenset(),
+        banned_edges: dict[_VT, set[_VT]] | None = None
+    ) -> tuple[list[_VT], float]:
+        """Run Dijkstra's algorithm from both `start` and `goal` until they meet.
+        
+        The search acts as if `banned_vertices` and `banned_edges` (which maps each
+        vertex to the neighbors it can't go to, and must list both directions) weren't
+        in the graph.
+        """
+        # index 0 is the search from `start`, index 1 is the search from `goal`
+        trees: tuple[dict[_VT, _VT], dict[_VT, _VT]] = ({}, {})
+        distances: tuple[dict[_VT, float], dict[_VT, float]] = ({start: 0}, {goal: 0})
+        settled: tuple[set[_VT], set[_VT]] = (set(), set())
+        queues = (
+            _IndexedPriorityQueue[_VT, float]([(start, 0)]),
+            _IndexedPriorityQueue[_VT, float]([(goal, 0)]),
+        )
+        
+        best = math.inf
+        meeting: tuple[_VT, _VT] | None = None # edge (forward side, backward side)
+        
+        while queues[0] and queues[1]:
+            # once the closest unsettled vertices on both sides are further apart than
+            # the best path so far, then no better path can exist
+            if (
+                distances[0][queues[0].front()] + distances[1][queues[1].front()]
+                >= best
+            ):
+                break
+            
+            side = 0 if len(queues[0]) <= len(queues[1]) else 1
+            other = 1 - side
+            dist, other_dist = distances[side], distances[other]
+            
+            v = queues[side].pop()
+            settled[side].add(v)
+            banned_neighbors = banned_edges.get(v, ()) if banned_edges else ()
+            for u, weight in self.neighbors(v):
+                if u in banned_vertices or u in banned_neighbors:
+                    continue
+                distance = dist[v] + weight
+                if u in other_dist and distance + other_dist[u] < best:
+                    best = distance + other_dist[u]
+                    meeting = (v, u) if side == 0 else (u, v)
+                if u in settled[side]:
+                    continue
+                if u not in dist:
+                    dist[u] = distance
+                    trees[side][u] = v
+                    queues[side].push(u, distance)
+                elif distance < dist[u]:
+                    dist[u] = distance
+                    trees[side][u] = v
+                    queues[side].update(u, distance)
+        
+        if meeting is None:
+            return [], math.inf
+        
+        forward = path_from_tree(trees[0], start, meeting[0])
+        backward = path_from_tree(trees[1], goal, meeting[1])
+        return forward + backward[::-1], best
+    
+    def minimum_spanning_forest(
+        self,
+        *,
+        engine: Literal['kruskal', 'boruvka'] = 'kruskal',
+        workers: int | None = None
+    ) -> list[SpanningTree[_VT, _WT]]:
+        """Find a minimum spanning tree of every connected component of the graph.
+        
+        This algorithm internally uses Kruskal's algorithm, so unlike
+        `minimum_spanning_tree`, it doesn't need a start vertex, and it covers the
+        whole graph even if it isn't connected.
+        
+        With `engine='boruvka'`, this instead uses Borůvka's algorithm, which works in
+        rounds: each round finds the cheapest edge out of every component, and merges
+        the components along those edges. The edges are split into shards, which a
+        pool of `workers` processes (or one per CPU, if None) scan in parallel, so
+        this is the one to use on very large graphs with lots of cores. With
+        `workers=1`, it all happens in this process. The weights are shared with the
+        workers as a flat array, so if they aren't all ints or floats that fit in one
+        (Fractions, say), then this quietly uses Kruskal's algorithm instead.
+        
+        Either way, the trees have the same total weights, but if some edges have
+        the same weight, then the edges in them might not be the same.
+
+        Returns
+        -------
+        list[SpanningTree[_VT, _WT]]
+            One spanning tree per connected component, each with the vertices in the
+            component, the edges `(u, v, weight)` in the tree, and the total weight of
+            the tree.
+
+        Raises
+        ------
+        ValueError
+            If `engine` isn't one of the above, or if `workers` is given without
+            `engine='boruvka'`.
+        """
+        if engine == 'boruvka':
+            return self._boruvka(workers)
+        if engine != 'kruskal':
+            raise ValueError(f"unknown spanning tree engine {engine!r}")
+        if workers is not None:
+            raise ValueError("workers can only be used with the boruvka engine")
+        return self._kruskal()
+    
+    def _kruskal(self) -> list[SpanningTree[_VT, _WT]]:
+        # Complexity: O(E log E)
+        components = _DisjointSet(self._vertices)
+        tree_edges: list[tuple[_VT, _VT, _WT]] = []
+        
+        for (u, v), weight in sorted(self._edge_weights.items(), key=lambda e: e[1]):
+            if u == v: # self loops are never in a spanning tree
+                continue
+            if components.union(u, v):
+                tree_edges.append((u, v, weight))
+        
+        return self._spanning_forest(components.find, tree_edges)
+    
+    def _spanning_forest(
+        self,
+        component: Callable[[_VT], Hashable],
+        tree_edges: list[tuple[_VT, _VT, _WT]]
+    ) -> list[SpanningTree[_VT, _WT]]:
+        # group the vertices and tree edges by which component they're in, going by
+        # the representative that `component` gives for each vertex
+        forest: dict[Hashable, SpanningTree[_VT, _WT]] = {}
+        for v in self._vertices:
+            root = component(v)
+            if root not in forest:
+                forest[root] = SpanningTree(set(), [], 0)
+            forest[root].vertices.add(v)
+        for u, v, weight in tree_edges:
+            tree = forest[component(u)]
+            tree.edges.append((u, v, weight))
+        
+        trees: list[SpanningTree[_VT, _WT]] = []
+        for tree in forest.values():
+            # weights are only known to be comparable, not addable, so this has to be
+            # untyped
+            total: typing.Any = tree.weight
+            for _, _, weight in tree.edges:
+                total += weight
+            trees.append(tree._replace(weight=total))
+        return trees
+    
+    def _boruvka(self, workers: int | None) -> list[SpanningTree[_VT, _WT]]:
+        # Complexity: O(E log V) work over O(log V) rounds, since every round at
+        # least halves the number of components that still have edges out. edges
+        # inside a component are dropped as soon as they're seen, so each round only
+        # scans the edges that were still between components after the last one.
+        # the vertices get ids of their own here, rather than using the interning
+        # table, so that this works on snapshots too
+        vertices = list(self._vertices)
+        ids = {v: i for i, v in enumerate(vertices)}
+        sources, targets = array('q'), array('q')
+        weights: list[_WT] = []
+        for (u, v), weight in self._edge_weights.items():
+            sources.append(ids[u])
+            targets.append(ids[v])
+            weights.append(weight)
+        try:
+            packed_weights = _pack_weights(weights)
+        except (TypeError, ValueError):
+            return self._kruskal()
+        buffers: list[array[typing.Any]] = [
+            array('q', sources),
+            array('q', targets),
+            packed_weights,
+            array('q', range(len(weights))),
+            array('q', range(len(vertices))),
+        ]
+        
+        components = _DisjointSet(range(len(vertices)))
+        tree_edges: list[tuple[_VT, _VT, _WT]] = []
+        for cheapest in _boruvka_rounds(buffers, components, workers):
+            for e in set(cheapest.values()):
+                u, v = sources[e], targets[e]
+                if components.union(u, v):
+                    tree_edges.append((vertices[u], vertices[v], weights[e]))
+        
+        roots = [components.find(i) for i in range(len(vertices))]
+        return self._spanning_forest(lambda v: roots[ids[v]], tree_edges)
+    
+    def all_pairs_shortest_paths(
+        self: Graph[_VT, float] | Graph[_VT, int],
+        sources: Iterable[_VT] | None = None,
+        workers: int | None = None
+    ) -> Iterator[tuple[_VT, tuple[dict[_VT, _VT], dict[_VT, float]]]]:
+        """Run `shortest_paths` from each of the given sources, in parallel.
+        
+        The graph is frozen (see `freeze`) and sent to each worker process once, when
+        the process starts, rather than once per source. Results are yielded as soon as
+        each one finishes, so they may not come out in the same order as `sources`.
+        Sources are handed out a few at a time, and only a couple of batches per worker
+        are ever waiting to be yielded, so memory doesn't grow with the number of
+        sources as long as the results are consumed as they come.
+
+        Parameters
+        ----------
+        sources : Iterable[_VT] | None
+            The vertices to find shortest paths from. If None, then every vertex in
+            the graph is used.
+        workers : int | None
+            The number of worker processes to use. If None, then this is the number of
+            CPUs on the machine. If 1, then everything is run in this process.
+
+        Returns
+        -------
+        Iterator[tuple[_VT, tuple[dict[_VT, _VT], dict[_VT, float]]]]
+            Pairs of each source and the result of `shortest_paths` from that source.
+
+        Raises
+        ------
+        ValueError
+            If any of the sources are not in the graph.
+        """
+        sources = list(self._vertices if sources is None else sources)
+        for source in sources:
+            if source not in self._vertices:
+                raise ValueError(f"{source} is not in the graph")
+        return _all_pairs_shortest_paths(self.freeze(), sources, workers)
+    
+    @_cached
+    def minimum_spanning_tree(
+        self,
+        start: _VT,
+        *,
+        stats: SearchStats | None = None
+    ) -> tuple[dict[_VT, _VT], dict[_VT, _WT]]:
+        """Find the minimum spanning tree of the graph, starting from the given vertex.
+        
+        This algorithm internally uses Prim's algorithm. As such, if the graph is not
+        fully connected, then the returned tree will not be a spanning tree.
+        
+        If `stats` is given, it's filled in with counts of what the search did and how
+        long each phase ('initialize', 'search' and 'weights') took. This skips the
+        result cache.
+
+        Returns
+        -------
+        tuple[Mapping[_VT, _VT], Mapping[_VT, float]]
+            A tuple of two mappings.
+            The first mapping maps each vertex to the vertex that comes before it in the
+            minimum spanning tree.
+            The second mapping maps each vertex to the weight of the edge between it and
+            the vertex that comes before it in the minimum spanning tree.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """
+        if start not in self._vertices:
+            raise ValueError(f"{start} is not in the graph")
+        return self._prim(start, stats)
+    
+    def _prim(
+        self,
+        start: _VT,
+        stats: SearchStats | None = None
+    ) -> tuple[dict[_VT, _VT], dict[_VT, _WT]]:
+        # like `_dijkstra`, the loop never looks at `stats`. the heap counts its own
+        # operations, and every vertex in the tree had all its neighbors scanned.
+        # every edge within the tree (which is all of the edges of its component) was
+        # pushed once from each end, and exactly one of those pushes was to a vertex
+        # that wasn't in the tree yet, except self-loops, which never are
+        phase_start = 0.0 if stats is None else time.perf_counter()
+        tree: dict[_VT, _VT] = {start: start}
+        edge_queue = (
+            _PriorityQueue[tuple[_VT, _VT], _WT]() if stats is None
+            else _CountingPriorityQueue[tuple[_VT, _VT], _WT](stats)
+        )
+        for n, weight in self.neighbors(start):
+            edge_queue.push((start, n), weight)
+        if stats is not None:
+            phase_start = stats.add_time('initialize', phase_start)
+        
+        while edge_queue:
+            u, v = edge_queue.pop()
+            if v not in tree:
+                tree[v] = u
+                for n, weight in self.neighbors(v):
+                    edge_queue.push((v, n), weight)
+        if stats is not None:
+            adjacency = self._adjacency
+            scanned = sum(len(adjacency[v]) for v in tree)
+            loops = sum(1 for v in tree if v in adjacency[v])
+            stats.vertices_settled += len(tree)
+            stats.neighbors_calls += len(tree)
+            stats.edges_scanned += scanned
+            stats.edges_relaxed += (scanned - loops) // 2
+            phase_start = stats.add_time('search', phase_start)
+        
+        del tree[start]
+        
+        weights = {v: self.weight(v, tree[v]) for v in tree}
+        if stats is not None:
+            stats.add_time('weights', phase_start)
+        return tree, weights
+    
+    @staticmethod
+    def _from_csr(
+        vertices: Sequence[_VT],
+        offsets: Sequence[int],
+        neighbors: Sequence[int],
+        weights: Sequence[_WT],
+    ) -> Graph[_VT, _WT]:
+        """Build a graph straight from compressed sparse row arrays.
+        
+        This is what `FrozenGraph.thaw` uses. Nothing is checked, so the arrays have
+        to be as valid as a `FrozenGraph`'s: distinct vertices, every edge stored in
+        both directions, and no negative weights.
+        """
+        # Complexity: O(V + E), without any of the per edge checks of `add_edges`
+        graph = Graph[_VT, _WT]()
+        graph._ids.update((v, i) for i, v in enumerate(vertices))
+        graph._interned.extend(vertices)
+        adjacency, edge_weights = graph._adjacency, graph._edge_weights
+        ends = [vertices[j] for j in neighbors]
+        for i, v in enumerate(vertices):
+            start, end = offsets[i], offsets[i + 1]
+            adjacency[v] = dict(zip(ends[start:end], weights[start:end], strict=True))
+            key = i << _ID_BITS
+            edge_weights.update_keys(
+                (key | j, weight)
+                for j, weight in zip(
+                    neighbors[start:end], weights[start:end], strict=True
+                )
+                if j >= i # only do each edge once, from its lower id end
+            )
+        return graph
+    
+    def freeze(self) -> FrozenGraph[_VT, _WT]:
+        """Return an immutable, array-backed snapshot of the graph.
+        
+        See `FrozenGraph` for details. Changes to this graph after freezing it are
+        not reflected in the snapshot.
+
+        Raises
+        ------
+        TypeError
+            If any weight isn't an int or a float.
+        ValueError
+            If some int weight can't be stored exactly, because it doesn't fit in 64
+            bits, or because there are float weights too and it doesn't fit in one.
+        """
+        # Complexity: O(V + E)
+        vertices = list(self._vertices)
+        ids = {v: i for i, v in enumerate(vertices)}
+        
+        offsets = array('q', [0])
+        neighbors = array('q')
+        weight_list: list[_WT] = []
+        for v in vertices:
+            for u, weight in self._adjacency[v].items():
+                neighbors.append(ids[u])
+                weight_list.append(weight)
+            offsets.append(len(neighbors))
+        
+        return FrozenGraph(vertices, offsets, neighbors, _pack_weights(weight_list))
+    
+    def snapshot(self) -> GraphSnapshot[_VT, _WT]:
+        """Return a read-only view of the graph as it is right now.
+        
+        Unlike `freeze`, this doesn't copy anything up front: the snapshot shares its
+        adjacency dicts with this graph, and this graph copies them before it next
+        changes them. So reader threads can run queries on a snapshot without any
+        locking while another thread keeps changing the graph, and they only ever see
+        the graph as it was when the snapshot was taken (never half of an
+        `add_edges` batch, say). Snapshots should be taken from the thread that
+        changes the graph, between changes.
+        
+        The copying isn't entirely per vertex: the first change after a snapshot
+        copies the outer dict from each vertex to its neighbor dict, which is O(V)
+        (but shallow, so no neighbor dicts are copied). After that, each change only
+        copies the neighbor dicts of the vertices it touches, once each. So taking a
+        snapshot before every small batch of changes costs O(V) per batch.
+        """
+        # Complexity: O(1), and the first change after it costs an extra O(V)
+        self._adjacency_shared = True
+        self._owned = set()
+        return GraphSnapshot(self._adjacency, self._version)
+    
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Save the graph to a binary file. See `FrozenGraph.save`."""
+        self.freeze().save(path)
+    
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> Graph[typing.Any, typing.Any]:
+        """Load a graph saved by `save`. See `FrozenGraph.load`."""
+        return FrozenGraph[typing.Any, typing.Any].load(path).thaw()
+    
+    # this shit is dumb
+    fewest_flights = paths_with_fewest_edges
+    shortest_path = shortest_paths
+    minimum_salt = minimum_spanning_tree
+
+class GraphSnapshot(Graph[_VT, _WT]):
+    # a graph that can't be changed, made by `Graph.snapshot`. it only has the
+    # adjacency dicts it shares with the live graph, so the vertex set and the edge
+    # weights are views over those instead of their own copies. it has no interning
+    # table (`_ids`, `_interned` and `_free_ids`), since the live graph changes its
+    # own in place and copying it would make taking a snapshot O(V)
+    
+    def __init__(self, adjacency: dict[_VT, dict[_VT, _WT]], version: int) -> None:
+        """Wrap adjacency dicts that nobody is going to change anymore."""
+        self._adjacency = adjacency
+        self._vertices = adjacency.keys()
+        self._edge_weights = _EdgeWeightView(adjacency) # pyright: ignore[reportAttributeAccessIssue]
+        self._version = version
+        self._cache = None
+        self._adjacency_shared = False
+        self._owned = None
+    
+    def _read_only(self, *args: object) -> typing.NoReturn:
+        raise TypeError("graph snapshots can't be changed")
+    
+    add_vertex = remove_vertex = add_edge = remove_edge = _read_only # pyright: ignore[reportAssignmentType]
+    add_edges = remove_edges = _read_only # pyright: ignore[reportAssignmentType]
+    
+    def snapshot(self) -> GraphSnapshot[_VT, _WT]:
+        """Return this snapshot, since it can't change anyway."""
+        return self
+
+
+# the frozen graph each worker process runs its queries on, sent once by the initializer
+_worker_graph: FrozenGraph[typing.Any, typing.Any] | None = None
+
+def init_worker(graph: FrozenGraph[typing.Any, typing.Any]) -> None:
+    """Set the graph that `worker_shortest_paths` searches in this process.
+    
+    This is meant to be the initializer of a `ProcessPoolExecutor`, so that the
+    graph is only sent to each worker once.
+    """
+    global _worker_graph # noqa: PLW0603
+    _worker_graph = graph
+
+def worker_shortest_paths(
+    source: _VT
+) -> tuple[_VT, tuple[dict[_VT, _VT], dict[_VT, float]]]:
+    """Return `source` and `shortest_paths` from it, in the graph from `init_worker`."""
+    assert _worker_graph is not None
+    return source, _worker_graph.shortest_paths(source)
+
+# Borůvka's algorithm keeps the edges that are still between components in five
+# parallel buffers: both ends' components, the weight, and the edge's index in the
+# graph, plus the component of each vertex id in the fifth. with worker processes,
+# these are all in shared memory, so each round only sends the bounds of each shard
+_Buffer: typing.TypeAlias = 'array[typing.Any] | memoryview'
+
+# the buffers each worker process scans, and the shared memory they're in
+_worker_buffers: tuple[_Buffer, ...] = ()
+_worker_blocks: list[SharedMemory] = []
+
+def _shared_view(block: SharedMemory, typecode: str, length: int) -> memoryview:
+    """Return a view of the first `length` items of the given type in `block`."""
+    assert block.buf is not None
+    size = length * struct.calcsize(typecode)
+    # the typecode is only known at runtime, which typeshed's overloads can't take
+    return typing.cast('memoryview', block.buf[:size].cast(typecode)) # pyright: ignore[reportCallIssue, reportArgumentType]
+
+def _share_buffers(
+    buffers: list[array[typing.Any]],
+    stack: contextlib.ExitStack
+) -> tuple[tuple[memoryview, ...], list[tuple[str, str, int]]]:
+    """Copy each buffer into shared memory, which is freed when `stack` closes.
+    
+    Returns views of the shared copies, and the name, typecode and length of each
+    one, for `_init_boruvka_worker`.
+    """
+    views: list[memoryview] = []
+    layout: list[tuple[str, str, int]] = []
+    for buffer in buffers:
+        block = SharedMemory(create=True, size=max(len(buffer) * buffer.itemsize, 1))
+        stack.callback(block.unlink)
+        stack.callback(block.close)
+        view = _shared_view(block, buffer.typecode, len(buffer))
+        stack.callback(view.release)
+        view[:] = buffer
+        views.append(view)
+        layout.append((block.name, buffer.typecode, len(buffer)))
+    return tuple(views), layout
+
+def _init_boruvka_worker(layout: list[tuple[str, str, int]]) -> None:
+    global _worker_buffers # noqa: PLW0603
+    views: list[memoryview] = []
+    for name, typecode, length in layout:
+        block = SharedMemory(name)
+        _worker_blocks.append(block)
+        views.append(_shared_view(block, typecode, length))
+    _worker_buffers = tuple(views)
+
+def _boruvka_shard(
+    buffers: tuple[_Buffer, ...],
+    lo: int,
+    hi: int
+) -> tuple[int, dict[int, int]]:
+    """Find the cheapest edge out of each component, among edges `lo` through `hi`.
+    
+    Edges inside one component are dropped, and the rest are moved down over them
+    (in the same order) with their ends relabeled to their components, so this
+    returns where the shard ends now, along with the new index of each component's
+    cheapest edge. Ties between edges of the same weight go to the lower index,
+    which is what keeps the edges picked for different components from making a
+    cycle.
+    """
+    # Complexity: O(hi - lo)
+    sources, targets, weights, ids, labels = buffers
+    cheapest: dict[int, int] = {}
+    end = lo
+    for e in range(lo, hi):
+        a, b = labels[sources[e]], labels[targets[e]]
+        if a == b:
+            continue
+        weight = weights[e]
+        sources[end], targets[end], weights[end], ids[end] = a, b, weight, ids[e]
+        for c in (a, b):
+            best = cheapest.get(c)
+            if best is None or weight < weights[best]:
+                cheapest[c] = end
+        end += 1
+    return end, cheapest
+
+def _worker_boruvka_shard(lo: int, hi: int) -> tuple[int, dict[int, int]]:
+    return _boruvka_shard(_worker_buffers, lo, hi)
+
+def _boruvka_rounds(
+    buffers: list[array[typing.Any]],
+    components: _DisjointSet[int],
+    workers: int | None
+) -> Iterator[dict[int, int]]:
+    # yields the cheapest edge out of each component every round, by the edge's index
+    # in the graph, and expects the caller to merge the components in `components`
+    # before asking for the next round. stops once no component has an edge out.
+    num_edges = len(buffers[0])
+    # with no edges at all, there's no point starting any workers
+    num_shards = 1 if workers == 1 or not num_edges else workers or os.cpu_count() or 1
+    bounds = [num_edges * i // num_shards for i in range(num_shards + 1)]
+    shards = list(itertools.pairwise(bounds))
+    
+    with contextlib.ExitStack() as stack:
+        views: tuple[_Buffer, ...] = tuple(buffers)
+        pool: ProcessPoolExecutor | None = None
+        if num_shards > 1:
+            views, layout = _share_buffers(buffers, stack)
+            pool = stack.enter_context(ProcessPoolExecutor(
+                num_shards, initializer=_init_boruvka_worker, initargs=(layout,)
+            ))
+        weights, ids, labels = views[2], views[3], views[4]
+        
+        while True:
+            if pool is None:
+                results = [_boruvka_shard(views, lo, hi) for lo, hi in shards]
+            else:
+                futures = [
+                    pool.submit(_worker_boruvka_shard, lo, hi) for lo, hi in shards
+                ]
+                results = [future.result() for future in futures]
+            shards = [
+                (lo, end) for (lo, _), (end, _) in zip(shards, results, strict=True)
+            ]
+            
+            # the shards are in edge order, so keeping the earlier edge on ties
+            # breaks them the same way as one big scan would
+            cheapest: dict[int, int] = {}
+            for _, found in results:
+                for c, e in found.items():
+                    best = cheapest.get(c)
+                    if best is None or weights[e] < weights[best]:
+                        cheapest[c] = e
+            if not cheapest:
+                return
+            yield {c: ids[e] for c, e in cheapest.items()}
+            # every edge that's left has its ends relabeled to their components, so
+            # only the labels of the components that were just merged need updating
+            for c in cheapest:
+                labels[c] = components.find(c)
+
+def _worker_shortest_paths_chunk(
+    sources: list[_VT]
+) -> list[tuple[_VT, tuple[dict[_VT, _VT], dict[_VT, float]]]]:
+    return [worker_shortest_paths(source) for source in sources]
+
+# the most sources to send to a worker at once. bigger chunks mean less overhead per
+# task, but more O(V) results sitting around waiting to be picked up
+_MAX_CHUNK_SIZE = 16
+
+def _all_pairs_shortest_paths(
+    graph: FrozenGraph[_VT, typing.Any],
+    sources: list[_VT],
+    workers: int | None
+) -> Iterator[tuple[_VT, tuple[dict[_VT, _VT], dict[_VT, float]]]]:
+    # this is a separate generator so that `Graph.all_pairs_shortest_paths` can check
+    # its arguments right away, instead of when the first result is asked for
+    if workers == 1:
+        for source in sources:
+            yield source, graph.shortest_paths(source)
+        return
+    
+    # only keep a couple of chunks per worker in flight, so that results that haven't
+    # been consumed yet don't pile up: memory stays O(workers * chunk size * V)
+    # however many sources there are
+    num_workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, min(_MAX_CHUNK_SIZE, len(sources) // (4 * num_workers)))
+    chunks = (
+        sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)
+    )
+    
+    pool = ProcessPoolExecutor(
+        num_workers, initializer=init_worker, initargs=(graph,)
+    )
+    with pool:
+        in_flight: set[Future[list[typing.Any]]] = {
+            pool.submit(_worker_shortest_paths_chunk, chunk)
+            for chunk in itertools.islice(chunks, 2 * num_workers)
+        }
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                for chunk in itertools.islice(chunks, 1):
+                    in_flight.add(pool.submit(_worker_shortest_paths_chunk, chunk))
+                results = future.result()
+                del future # so the results can be freed as soon as they're consumed
+                yield from results
+
+# the layout of the header of a saved graph file. it's followed by the pickled vertex
+# table, padded to a multiple of 8 bytes, then the offsets, neighbor ids, and weights
+# arrays from a `FrozenGraph`, all little-endian 8 byte values. other CSR structures
+# (see `ContractionHierarchy`) use the same layout with their own magic, and may have
+# more arrays of 8 byte ints after the weights, one entry per neighbor.
+_FILE_MAGIC = b'CSEGRAPH'
+_FILE_VERSION = 1
+# magic, version, weight typecode, number of vertices, number of adjacency entries,
+# length of the vertex table in bytes
+_FILE_HEADER = struct.Struct('<8sI4sQQQ')
+
+def _save_csr_file(
+    path: str | os.PathLike[str],
+    magic: bytes,
+    vertices: list[typing.Any],
+    arrays: Sequence[array[typing.Any]]
+) -> None:
+    """Save a vertex table and CSR arrays (offsets, neighbors, weights, ...)."""
+    offsets, neighbors, weights = arrays[:3]
+    vertex_table = pickle.dumps(vertices, protocol=pickle.HIGHEST_PROTOCOL)
+    padding = -len(vertex_table) % 8
+    header = _FILE_HEADER.pack(
+        magic,
+        _FILE_VERSION,
+        weights.typecode.encode(),
+        len(vertices),
+        len(neighbors),
+        len(vertex_table),
+    )
+    assert len(offsets) == len(vertices) + 1
+    
+    with open(path, 'wb') as file:
+        file.write(header)
+        file.write(vertex_table)
+        file.write(bytes(padding))
+        for values in arrays:
+            if sys.byteorder == 'big':
+                swapped = array(values.typecode, values)
+                swapped.byteswap()
+                swapped.tofile(file)
+            else:
+                values.tofile(file)
+
+def _load_csr_file(
+    path: str | os.PathLike[str],
+    magic: bytes,
+    num_extra_arrays: int = 0
+) -> tuple[list[typing.Any], list[array[typing.Any]]]:
+    """Load a vertex table and CSR arrays saved by `_save_csr_file`."""
+    with open(path, 'rb') as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        if len(mapped) < _FILE_HEADER.size:
+            raise ValueError(f"{path} is not a saved graph")
+        file_magic, version, typecode, num_vertices, num_entries, table_length = (
+            _FILE_HEADER.unpack_from(mapped)
+        )
+        if file_magic != magic:
+            raise ValueError(f"{path} is not a saved graph")
+        if version != _FILE_VERSION:
+            raise ValueError(f"{path} has unsupported format version {version}")
+        
+        position = _FILE_HEADER.size
+        if position + table_length > len(mapped):
+            raise ValueError(f"{path} is truncated")
+        try:
+            vertices: list[typing.Any] = pickle.loads( # noqa: S301
+                mapped[position:position + table_length]
+            )
+        except (pickle.UnpicklingError, EOFError) as error:
+            raise ValueError(f"{path} has a corrupted vertex table") from error
+        position += table_length + -table_length % 8
+        
+        arrays: list[array[typing.Any]] = []
+        for code, length in (
+            ('q', num_vertices + 1),
+            ('q', num_entries),
+            (typecode.rstrip(b'\0').decode(), num_entries),
+            *[('q', num_entries)] * num_extra_arrays,
+        ):
+            values: array[typing.Any] = array(code)
+            end = position + length * values.itemsize
+            if end > len(mapped):
+                raise ValueError(f"{path} is truncated")
+            values.frombytes(mapped[position:end])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            arrays.append(values)
+            position = end
+    
+    if len(vertices) != num_vertices:
+        raise ValueError(f"{path} is corrupted")
+    return vertices, arrays
+
+def _pack_weights(weights: Sequence[typing.Any]) -> array[typing.Any]:
+    """Pack edge weights into an array of 64 bit ints if they're all ints, or doubles.
+    
+    Ints mixed in with floats are turned into floats, but only if that doesn't
+    change them. Anything else would quietly come back as a different value or type
+    after a round trip, so it isn't allowed.
+
+    Raises
+    ------
+    TypeError
+        If any weight isn't exactly an int or a float (bools, Decimals, Fractions,
+        and so on).
+    ValueError
+        If the weights are all ints but some don't fit in 64 bits, or some are floats
+        and some are ints that a float can't hold exactly.
+    """
+    kinds: set[type[int | float]] = {type(weight) for weight in weights}
+    if not kinds <= {int, float}:
+        unsupported = ', '.join(sorted(kind.__name__ for kind in kinds - {int, float}))
+        raise TypeError(
+            f"frozen graphs can only have int or float weights, not {unsupported}"
+        )
+    if kinds == {int}:
+        try:
+            return array('q', weights)
+        except OverflowError:
+            raise ValueError("int weights must fit in 64 bits") from None
+    packed = array('d', weights)
+    if int in kinds and any(
+        type(weight) is int and packed[i] != weight for i, weight in enumerate(weights)
+    ):
+        raise ValueError("some int weights are too big to mix with float weights")
+    return packed
+
+class FrozenGraph(Collection[_VT | tuple[_VT, _VT]], Generic[_VT, _WT]):
+    # a compressed sparse row (CSR) representation of a graph, where every vertex gets
+    # an integer id, and the neighbors of the vertex with id `i` are the ids
+    # `_neighbors[_offsets[i]:_offsets[i+1]]`, with the weights at the same indices in
+    # `_weights`. since the graph is undirected, each edge is stored in both directions.
+    # invariant: len(_offsets) == len(_vertices) + 1
+    # invariant: len(_neighbors) == len(_weights) == _offsets[-1]
+    _vertices: list[_VT]
+    _ids: dict[_VT, int]
+    _offsets: array[int]
+    _neighbors: array[int]
+    _weights: array[typing.Any]
+    
+    def __init__(
+        self,
+        vertices: Sequence[_VT],
+        offsets: array[int],
+        neighbors: array[int],
+        weights: array[typing.Any]
+    ) -> None:
+        """Initialize a frozen graph from its CSR arrays. Use `Graph.freeze` instead."""
+        self._vertices = list(vertices)
+        self._ids = {v: i for i, v in enumerate(self._vertices)}
+        self._offsets = offsets
+        self._neighbors = neighbors
+        self._weights = weights
+    
+    def __getstate__(
+        self
+    ) -> tuple[list[_VT], array[int], array[int], array[typing.Any]]:
+        # no need to send the id table around, since it's cheap to rebuild
+        return self._vertices, self._offsets, self._neighbors, self._weights
+    
+    def __setstate__(
+        self,
+        state: tuple[list[_VT], array[int], array[int], array[typing.Any]]
+    ) -> None:
+        self.__init__(*state)
+    
+    def __contains__(self, value: object | _VT | tuple[_VT, _VT]) -> bool:
+        """Return whether the given vertex or edge is in the graph."""
+        if isinstance(value, tuple) and len(value) == 2: # pyright: ignore[reportUnknownArgumentType]
+            u, v = typing.cast('tuple[_VT, _VT]', value)
+            return u in self._ids and v in self._ids and self._edge_index(u, v) >= 0
+        try:
+            return value in self._ids
+        except TypeError:
+            return False
+    
+    def __len__(self) -> int:
+        """Return the number of vertices in the graph."""
+        return len(self._vertices)
+    
+    def __iter__(self) -> Iterator[_VT]:
+        """Return an iterator over all vertices in the graph."""
+        return iter(self._vertices)
+    
+    def _edge_index(self, u: _VT, v: _VT) -> int:
+        """Return the index of the edge (u, v) in the CSR arrays, or -1 if absent."""
+        # Complexity: O(deg(u))
+        i, j = self._ids[u], self._ids[v]
+        for e in range(self._offsets[i], self._offsets[i + 1]):
+            if self._neighbors[e] == j:
+                return e
+        return -1
+    
+    def vertex_id(self, v: _VT) -> int:
+        """Return the integer id of the given vertex.
+
+        Raises
+        ------
+        ValueError
+            If the vertex is not in the graph.
+        """
+        if v not in self._ids:
+            raise ValueError(f"{v} is not in the graph")
+        return self._ids[v]
+    
+    def vertex(self, i: int) -> _VT:
+        """Return the vertex with the given integer id."""
+        return self._vertices[i]
+    
+    @property
+    def vertices(self) -> Sequence[_VT]:
+        """All vertices in the graph, in order of their integer ids."""
+        return self._vertices
+    
+    def csr_arrays(self) -> tuple[array[int], array[int], array[typing.Any]]:
+        """Return the compressed sparse row arrays of the graph, by integer id.
+        
+        The neighbors of the vertex with id `i` are
+        `neighbors[offsets[i]:offsets[i+1]]`, and the weights of those edges are at
+        the same indices of `weights`. Each edge is stored in both directions. The
+        arrays are shared, so don't modify them.
+
+        Returns
+        -------
+        tuple[array[int], array[int], array[typing.Any]]
+            The arrays `(offsets, neighbors, weights)`.
+        """
+        return self._offsets, self._neighbors, self._weights
+    
+    def thaw(self) -> Graph[_VT, _WT]:
+        """Return a new, mutable `Graph` with the same vertices and edges."""
+        # Complexity: O(V + E)
+        return Graph[_VT, _WT]._from_csr( # pyright: ignore[reportPrivateUsage]
+            self._vertices,
+            self._offsets,
+            self._neighbors.tolist(),
+            self._weights.tolist(),
+        )
+    
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Save the graph to a binary file, which can be loaded with `load`.
+        
+        The file starts with a versioned header, then the vertex table (pickled, so
+        vertices must be picklable), then the CSR arrays as packed 8 byte values.
+        """
+        _save_csr_file(
+            path,
+            _FILE_MAGIC,
+            self._vertices,
+            (self._offsets, self._neighbors, self._weights),
+        )
+    
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> FrozenGraph[_VT, _WT]:
+        """Load a graph saved by `save`.
+        
+        The file is memory-mapped, and the arrays are copied out of it in bulk, so no
+        edge is looked at individually. Since the vertex table is pickled, only load
+        files from sources you trust.
+
+        Raises
+        ------
+        ValueError
+            If the file isn't a saved graph, or was saved by an unsupported version.
+        """
+        vertices, arrays = _load_csr_file(path, _FILE_MAGIC)
+        offsets, neighbors, weights = arrays
+        return cls(vertices, offsets, neighbors, weights)
+    
+    def weight(self, u: _VT, v: _VT) -> _WT:
+        """Return the weight of the edge between the given nodes.
+
+        Raises
+        ------
+        ValueError
+            If the edge is not in the graph.
+        """
+        if (u, v) not in self:
+            raise ValueError(f"({u}, {v}) is not in the graph")
+        return self._weights[self._edge_index(u, v)]
+    
+    def neighbors(self, v: _VT) -> Iterable[tuple[_VT, _WT]]:
+        """Return the neighbors of the given node, along with their weights.
+
+        Raises
+        ------
+        ValueError
+            If the vertex is not in the graph.
+        """
+        i = self.vertex_id(v)
+        lo, hi = self._offsets[i], self._offsets[i + 1]
+        vertices = self._vertices
+        return zip(
+            (vertices[j] for j in self._neighbors[lo:hi]),
+            self._weights[lo:hi],
+            strict=True,
+        )
+    
+    def paths_with_fewest_edges(
+        self,
+        start: _VT,
+        *,
+        direction_optimizing: bool = False
+    ) -> tuple[dict[_VT, _VT], dict[_VT, int]]:
+        """Return the BFS tree and edge counts from `start`, like `Graph.paths_with_fewest_edges`.
+        
+        If `direction_optimizing` is set, then this uses `direction_optimizing_bfs`.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """ # noqa: E501
+        if direction_optimizing:
+            prev, num_edges, _ = self.direction_optimizing_bfs(start)
+            return prev, num_edges
+        
+        s = self.vertex_id(start)
+        offsets, neighbors = self._offsets, self._neighbors
+        
+        prev = [-1] * len(self._vertices)
+        num_edges = [-1] * len(self._vertices)
+        prev[s] = s
+        num_edges[s] = 0
+        node_queue: deque[int] = deque([s])
+        
+        while node_queue:
+            u = node_queue.popleft()
+            for v in neighbors[offsets[u]:offsets[u + 1]]:
+                if prev[v] < 0:
+                    prev[v] = u
+                    num_edges[v] = num_edges[u] + 1
+                    node_queue.append(v)
+        
+        vertices = self._vertices
+        return (
+            {vertices[v]: vertices[u] for v, u in enumerate(prev) if u >= 0 and v != s},
+            {vertices[v]: n for v, n in enumerate(num_edges) if n >= 0},
+        )
+    
+    def direction_optimizing_bfs(
+        self,
+        start: _VT,
+        *,
+        alpha: float = 14,
+        beta: float = 24
+    ) -> tuple[dict[_VT, _VT], dict[_VT, int], BFSReport]:
+        """Run a direction-optimizing breadth-first search from `start`.
+        
+        This gives the same edge counts as `paths_with_fewest_edges` (though maybe a
+        different tree, if there are ties). Normally, each level of the search looks
+        at every edge out of the frontier ("top-down"). But once the frontier is big,
+        most of those edges go to vertices that have already been visited, so it's
+        cheaper to instead have every unvisited vertex look for any neighbor in the
+        frontier, and stop at the first one it finds ("bottom-up").
+        
+        The search switches to bottom-up once the edges out of the frontier outnumber
+        the edges out of unvisited vertices divided by `alpha`, and back to top-down
+        once the frontier has fewer than `len(self) / beta` vertices. Which vertices
+        are visited, and which are in the frontier, are kept as bitsets over the ids.
+
+        Returns
+        -------
+        tuple[dict[_VT, _VT], dict[_VT, int], BFSReport]
+            The same two mappings as `paths_with_fewest_edges`, and a report of how
+            many edges were looked at compared to a plain top-down search.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """
+        s = self.vertex_id(start)
+        offsets, neighbors = self._offsets, self._neighbors
+        n = len(self._vertices)
+        
+        prev = array('q', [-1]) * n
+        num_edges = array('q', [-1]) * n
+        prev[s] = s
+        num_edges[s] = 0
+        visited = bytearray((n + 7) // 8)
+        visited[s >> 3] |= 1 << (s & 7)
+        
+        frontier = [s]
+        frontier_edges = offsets[s + 1] - offsets[s]
+        unvisited_edges = len(neighbors) - frontier_edges
+        edges_checked = 0
+        top_down_edges = frontier_edges # plain BFS looks at every edge of every vertex
+        bottom_up_levels = 0
+        bottom_up = False
+        depth = 0
+        
+        while frontier:
+            if bottom_up:
+                bottom_up = len(frontier) >= n / beta
+            else:
+                bottom_up = frontier_edges > unvisited_edges / alpha
+            
+            if bottom_up:
+                bottom_up_levels += 1
+                next_frontier, checked = self._bottom_up_step(frontier, visited, prev)
+            else:
+                next_frontier, checked = self._top_down_step(frontier, visited, prev)
+            edges_checked += checked
+            
+            depth += 1
+            frontier_edges = 0
+            for v in next_frontier:
+                num_edges[v] = depth
+                frontier_edges += offsets[v + 1] - offsets[v]
+            unvisited_edges -= frontier_edges
+            top_down_edges += frontier_edges
+            frontier = next_frontier
+        
+        vertices = self._vertices
+        return (
+            {vertices[v]: vertices[u] for v, u in enumerate(prev) if u >= 0 and v != s},
+            {vertices[v]: d for v, d in enumerate(num_edges) if d >= 0},
+            BFSReport(edges_checked, top_down_edges, bottom_up_levels),
+        )
+    
+    def _top_down_step(
+        self,
+        frontier: list[int],
+        visited: bytearray,
+        prev: array[int]
+    ) -> tuple[list[int], int]:
+        """Find the next BFS level by looking at every edge out of the frontier.
+        
+        Returns the next frontier, and how many edges were looked at.
+        """
+        offsets, neighbors = self._offsets, self._neighbors
+        next_frontier: list[int] = []
+        for u in frontier:
+            for e in range(offsets[u], offsets[u + 1]):
+                v = neighbors[e]
+                if not visited[v >> 3] & (1 << (v & 7)):
+                    visited[v >> 3] |= 1 << (v & 7)
+                    prev[v] = u
+                    next_frontier.append(v)
+        return next_frontier, sum(offsets[u + 1] - offsets[u] for u in frontier)
+    
+    def _bottom_up_step(
+        self,
+        frontier: list[int],
+        visited: bytearray,
+        prev: array[int]
+    ) -> tuple[list[int], int]:
+        """Find the next BFS level by having unvisited vertices look for the frontier.
+        
+        Returns the next frontier, and how many edges were looked at.
+        """
+        offsets, neighbors = self._offsets, self._neighbors
+        n = len(self._vertices)
+        in_frontier = bytearray((n + 7) // 8)
+        for u in frontier:
+            in_frontier[u >> 3] |= 1 << (u & 7)
+        
+        next_frontier: list[int] = []
+        edges_checked = 0
+        for v in range(n):
+            if visited[v >> 3] & (1 << (v & 7)):
+                continue
+            for e in range(offsets[v], offsets[v + 1]):
+                edges_checked += 1
+                u = neighbors[e]
+                if in_frontier[u >> 3] & (1 << (u & 7)):
+                    prev[v] = u
+                    next_frontier.append(v)
+                    break
+        # only mark them once the whole level is done, so that vertices found this
+        # level don't count as being in the frontier
+        for v in next_frontier:
+            visited[v >> 3] |= 1 << (v & 7)
+        return next_frontier, edges_checked
+    
+    def distance_table(self, start: _VT) -> array[float]:
+        """Return the distance from `start` to every vertex, indexed by vertex id.
+        
+        Vertices that can't be reached from `start` get a distance of `math.inf`.
+
+        Raises
+        ------
+        ValueError
+            If `start` is not in the graph.
+        """
+        # Complexity: O((V + E) log V)
+        s = self.vertex_id(start)
+        offsets, neighbors, weights = self._offsets, self._neighbors, self._weights
+        distances = array('d', [math.inf]) * len(self._vertices)
+        distances[s] = 0
+        settled = bytearray(len(self._vertices))
+        to_visit = _IndexedPriorityQueue[int, float]([(s, 0)])
+        
+        while to_visit:
+            v = to_visit.pop()
+            settled[v] = 1
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                if settled[u]:
+                    continue
+                distance = distances[v] + weights[e]
+                if distance < distances[u]:
+                    if distances[u] == math.inf:
+                        to_visit.push(u, distance)
+                    else:
+                        to_visit.update(u, distance)
+                    distances[u] = distance
+        
+        return distances
+    
+    def shortest_paths(
+        self: FrozenGraph[_VT, float] | FrozenGraph[_VT, int],
+        start: _VT
+    ) -> tuple[dict[_VT, _VT], dict[_VT, float]]:
+        """Return the Dijkstra tree and distances from `start`, like `Graph.shortest_paths`.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """ # noqa: E501
+        s = self.vertex_id(start)
+        offsets, neighbors, weights = self._offsets, self._neighbors, self._weights
+        
+        tree: dict[int, int] = {}
+        distances: dict[int, float] = {s: 0}
+        settled: set[int] = set()
+        to_visit = _IndexedPriorityQueue[int, float]([(s, 0)])
+        
+        while to_visit:
+            v = to_visit.pop()
+            settled.add(v)
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                if u in settled:
+                    continue
+                distance = distances[v] + weights[e]
+                if u not in distances:
+                    distances[u] = distance
+                    tree[u] = v
+                    to_visit.push(u, distance)
+                elif distance < distances[u]:
+                    distances[u] = distance
+                    tree[u] = v
+                    to_visit.update(u, distance)
+        
+        vertices = self._vertices
+        return (
+            {vertices[v]: vertices[u] for v, u in tree.items()},
+            {v: distances.get(i, math.inf) for i, v in enumerate(vertices)},
+        )
+    
+    def minimum_spanning_tree(
+        self,
+        start: _VT
+    ) -> tuple[dict[_VT, _VT], dict[_VT, _WT]]:
+        """Return the Prim tree and edge weights from `start`, like `Graph.minimum_spanning_tree`.
+
+        Raises
+        ------
+        ValueError
+            If the `start` vertex is not in the graph.
+        """ # noqa: E501
+        s = self.vertex_id(start)
+        offsets, neighbors, weights = self._offsets, self._neighbors, self._weights
+        
+        # maps each vertex id to the index of the edge that connects it to the tree
+        tree: dict[int, int] = {s: -1}
+        sources: dict[int, int] = {}
+        # items are (source vertex id, edge index)
+        edge_queue = _PriorityQueue[tuple[int, int], _WT](
+            ((s, e), weights[e]) for e in range(offsets[s], offsets[s + 1])
+        )
+        
+        while edge_queue:
+            u, e = edge_queue.pop()
+            v = neighbors[e]
+            if v not in tree:
+                tree[v] = e
+                sources[v] = u
+                for f in range(offsets[v], offsets[v + 1]):
+                    if neighbors[f] not in tree:
+                        edge_queue.push((v, f), weights[f])
+        
+        del tree[s]
+        
+        vertices = self._vertices
+        return (
+            {vertices[v]: vertices[sources[v]] for v in tree},
+            {vertices[v]: weights[e] for v, e in tree.items()},
+        )
+
+class DynamicShortestPaths(Generic[_VT]):
+    # keeps the result of `Graph.shortest_paths` from a single source up to date as
+    # edges are added, removed, or reweighted, by only redoing dijkstra's algorithm on
+    # the part of the tree that actually changed. all changes to the edges of the graph
+    # have to go through this object, otherwise it will get out of sync.
+    # invariant: v in _children[u] iff _tree[v] == u
+    # invariant: _distances only contains vertices that are reachable from _source
+    graph: Graph[_VT, float] | Graph[_VT, int]
+    _source: _VT
+    _tree: dict[_VT, _VT]
+    _children: dict[_VT, set[_VT]]
+    _distances: dict[_VT, float]
+    
+    def __init__(self, graph: Graph[_VT, float] | Graph[_VT, int], source: _VT) -> None:
+        """Find the shortest paths from `source`, and get ready to keep them updated.
+
+        Raises
+        ------
+        ValueError
+            If the `source` vertex is not in the graph.
+        """
+        tree, distances = graph.shortest_paths(source)
+        self.graph = graph
+        self._source = source
+        self._tree = dict(tree)
+        self._children = {}
+        for v, u in self._tree.items():
+            self._children.setdefault(u, set()).add(v)
+        self._distances = {v: d for v, d in distances.items() if d < math.inf}
+    
+    @property
+    def source(self) -> _VT:
+        return self._source
+    
+    @property
+    def tree(self) -> dict[_VT, _VT]:
+        """A copy of the shortest path tree, in the same format as `shortest_paths`."""
+        return dict(self._tree)
+    
+    @property
+    def distances(self) -> dict[_VT, float]:
+        """A copy of the distances to every vertex reachable from the source."""
+        return dict(self._distances)
+    
+    def distance(self, v: _VT) -> float:
+        """Return the distance from the source to `v`, or `math.inf` if unreachable."""
+        return self._distances.get(v, math.inf)
+    
+    def path(self, v: _VT) -> list[_VT]:
+        """Return the shortest path from the source to `v`, or `[]` if unreachable."""
+        if v not in self._distances:
+            return []
+        return path_from_tree(self._tree, self._source, v)
+    
+    def add_edge(self, u: _VT, v: _VT, weight: float) -> set[_VT]:
+        """Add or reweight the edge between `u` and `v`, and repair the shortest paths.
+        
+        See `Graph.add_edge`.
+
+        Returns
+        -------
+        set[_VT]
+            The vertices whose distance or parent in the tree may have changed.
+        """
+        old_weight = self.graph.weight(u, v) if (u, v) in self.graph else math.inf
+        self.graph.add_edge(u, v, weight) # pyright: ignore[reportArgumentType]
+        if weight < old_weight:
+            return self._edge_decreased(u, v, weight)
+        if weight > old_weight:
+            return self._edge_increased(u, v)
+        return set()
+    
+    def remove_edge(self, u: _VT, v: _VT) -> set[_VT]:
+        """Remove the edge between `u` and `v`, and repair the shortest paths.
+        
+        See `Graph.remove_edge`.
+
+        Returns
+        -------
+        set[_VT]
+            The vertices whose distance or parent in the tree may have changed.
+        """
+        self.graph.remove_edge(u, v)
+        return self._edge_increased(u, v)
+    
+    def _set_parent(self, v: _VT, parent: _VT) -> None:
+        if v in self._tree:
+            self._children[self._tree[v]].discard(v)
+        self._tree[v] = parent
+        self._children.setdefault(parent, set()).add(v)
+    
+    def _propagate(self, seeds: Iterable[tuple[_VT, float, _VT]]) -> set[_VT]:
+        """Lower the distances of the given (vertex, distance, parent)s, and cascade."""
+        # this is just dijkstra's algorithm, except it only ever visits vertices whose
+        # distances actually went down
+        changed: set[_VT] = set()
+        to_visit = _IndexedPriorityQueue[_VT, float]()
+        
+        def relax(v: _VT, distance: float, parent: _VT) -> None:
+            if distance < self._distances.get(v, math.inf):
+                self._distances[v] = distance
+                self._set_parent(v, parent)
+                changed.add(v)
+                if v in to_visit:
+                    to_visit.update(v, distance)
+                else:
+                    to_visit.push(v, distance)
+        
+        for v, distance, parent in seeds:
+            relax(v, distance, parent)
+        while to_visit:
+            u = to_visit.pop()
+            for v, weight in self.graph.neighbors(u):
+                relax(v, self._distances[u] + weight, u)
+        
+        return changed
+    
+    def _edge_decreased(self, u: _VT, v: _VT, weight: float) -> set[_VT]:
+        seeds: list[tuple[_VT, float, _VT]] = []
+        if u in self._distances:
+            seeds.append((v, self._distances[u] + weight, u))
+        if v in self._distances:
+            seeds.append((u, self._distances[v] + weight, v))
+        return self._propagate(seeds)
+    
+    def _edge_increased(self, u: _VT, v: _VT) -> set[_VT]:
+        # only the subtree hanging off of the edge can get further away. if the edge
+        # isn't in the tree at all, then nothing changes.
+        if self._tree.get(v) == u:
+            root = v
+        elif self._tree.get(u) == v:
+            root = u
+        else:
+            return set()
+        
+        # cut off the subtree entirely...
+        subtree = [root]
+        for x in subtree: # this appends to the list while iterating, which is fine
+            subtree.extend(self._children.get(x, ()))
+        self._children[self._tree.pop(root)].discard(root)
+        for x in subtree:
+            del self._distances[x]
+            self._children.pop(x, None)
+            self._tree.pop(x, None)
+        
+        # ...then reattach each vertex of it through its best neighbor outside of it
+        seeds: list[tuple[_VT, float, _VT]] = []
+        for x in subtree:
+            for y, weight in self.graph.neighbors(x):
+                if y in self._distances:
+                    seeds.append((x, self._distances[y] + weight, y))
+        self._propagate(seeds)
+        
+        return set(subtree)
+
+class ContractionHierarchy(Generic[_VT, _WT]):
+    # every vertex gets a rank, and the graph is stored as only the edges going from
+    # each vertex up to higher ranked vertices, in CSR form (see `FrozenGraph`). some of
+    # those edges are shortcuts, which stand in for the two edges through `_middles[e]`
+    # (a lower ranked vertex); for original edges, `_middles[e]` is -1. shortest paths
+    # always go up in rank and then back down, so a query is just two upward searches.
+    _vertices: list[_VT]
+    _ids: dict[_VT, int]
+    _offsets: array[int]
+    _targets: array[int]
+    _weights: array[typing.Any]
+    _middles: array[int]
+    
+    _FILE_MAGIC = b'CSECHIER'
+    
+    def __init__(
+        self,
+        vertices: Sequence[_VT],
+        offsets: array[int],
+        targets: array[int],
+        weights: array[typing.Any],
+        middles: array[int]
+    ) -> None:
+        """Initialize a contraction hierarchy from its arrays. Use `build` instead."""
+        self._vertices = list(vertices)
+        self._ids = {v: i for i, v in enumerate(self._vertices)}
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+        self._middles = middles
+    
+    def __len__(self) -> int:
+        """Return the number of vertices in the hierarchy."""
+        return len(self._vertices)
+    
+    @property
+    def num_shortcuts(self) -> int:
+        """The number of shortcut edges that were added during preprocessing."""
+        return sum(1 for middle in self._middles if middle >= 0)
+    
+    @classmethod
+    def build(
+        cls,
+        graph: Graph[_NVT, _NWT] | FrozenGraph[_NVT, _NWT],
+        *,
+        witness_limit: int = 64
+    ) -> ContractionHierarchy[_NVT, _NWT]:
+        """Preprocess a graph into a contraction hierarchy.
+        
+        Vertices are contracted one at a time, least important first, where the
+        importance of a vertex is how many shortcuts contracting it would add, minus
+        how many edges it has, plus how many of its neighbors are already contracted
+        (so that contractions are spread out over the graph). Importances are only
+        recomputed lazily, when a vertex comes up to be contracted next.
+        
+        Contracting a vertex adds a shortcut between each pair of its neighbors, unless
+        a "witness" path that is just as short is found without going through it. The
+        witness search gives up after settling `witness_limit` vertices, which only
+        means some unnecessary shortcuts get added.
+        """
+        frozen = graph.freeze() if isinstance(graph, Graph) else graph
+        offsets, neighbors, weights = frozen.csr_arrays()
+        
+        # the graph of vertices that haven't been contracted yet, with the middle
+        # vertex of each edge (or -1 if it's an original edge)
+        remaining: list[dict[int, tuple[typing.Any, int]]] = [{} for _ in frozen]
+        for v, adjacent in enumerate(remaining):
+            for e in range(offsets[v], offsets[v + 1]):
+                u = neighbors[e]
+                if u == v: # self loops are never on a shortest path
+                    continue
+                if u not in adjacent or weights[e] < adjacent[u][0]:
+                    adjacent[u] = (weights[e], -1)
+        
+        upward = cls._contract(remaining, witness_limit)
+        return ContractionHierarchy[_NVT, _NWT](
+            frozen.vertices, *cls._pack_upward(upward)
+        )
+    
+    @staticmethod
+    def _witness_distances(
+        remaining: list[dict[int, tuple[typing.Any, int]]],
+        source: int,
+        avoid: int,
+        costs: dict[int, typing.Any],
+        witness_limit: int
+    ) -> dict[int, float]:
+        """Search for paths from `source` to `costs` that don't go through `avoid`.
+        
+        Paths that are longer than every cost in `costs` aren't looked at.
+        """
+        # a bounded dijkstra search. distances to unsettled vertices are still lengths
+        # of actual paths, so they're good enough as witnesses.
+        limit: float = max(costs.values())
+        targets = set(costs)
+        distances: dict[int, float] = {source: 0}
+        to_visit = _IndexedPriorityQueue[int, float]([(source, 0)])
+        settled = 0
+        while to_visit and settled < witness_limit and targets:
+            x = to_visit.pop()
+            settled += 1
+            targets.discard(x)
+            for y, (weight, _) in remaining[x].items():
+                distance = distances[x] + weight
+                if y == avoid or distance > limit:
+                    continue
+                if y not in distances:
+                    distances[y] = distance
+                    to_visit.push(y, distance)
+                elif distance < distances[y]:
+                    distances[y] = distance
+                    to_visit.update(y, distance)
+        return distances
+    
+    @classmethod
+    def _shortcuts_for(
+        cls,
+        remaining: list[dict[int, tuple[typing.Any, int]]],
+        v: int,
+        witness_limit: int
+    ) -> list[tuple[int, int, typing.Any]]:
+        """Return the shortcuts `(u, w, weight)` that contracting `v` would need."""
+        needed: list[tuple[int, int, typing.Any]] = []
+        adjacent = list(remaining[v].items())
+        for i, (u, (weight_u, _)) in enumerate(adjacent):
+            costs = {w: weight_u + weight_w for w, (weight_w, _) in adjacent[i + 1:]}
+            if not costs:
+                continue
+            distances = cls._witness_distances(remaining, u, v, costs, witness_limit)
+            for w, cost in costs.items():
+                if distances.get(w, math.inf) > cost:
+                    needed.append((u, w, cost))
+        return needed
+    
+    @classmethod
+    def _contract(
+        cls,
+        remaining: list[dict[int, tuple[typing.Any, int]]],
+        witness_limit: int
+    ) -> list[list[tuple[int, typing.Any, int]]]:
+        """Contract every vertex of `remaining`, which is emptied in the process.
+        
+        Returns the upward edges `(target, weight, middle)` out of each vertex, where
+        the vertices are ranked in the order they were contracted.
+        """
+        n = len(remaining)
+        contracted_neighbors = [0] * n
+        
+        def importance(shortcuts: list[tuple[int, int, typing.Any]], v: int) -> int:
+            return len(shortcuts) - len(remaining[v]) + contracted_neighbors[v]
+        
+        to_contract = _IndexedPriorityQueue[int, int](
+            (v, importance(cls._shortcuts_for(remaining, v, witness_limit), v))
+            for v in range(n)
+        )
+        upward: list[list[tuple[int, typing.Any, int]]] = [[] for _ in range(n)]
+        
+        while to_contract:
+            v = to_contract.pop()
+            shortcuts = cls._shortcuts_for(remaining, v, witness_limit)
+            priority = importance(shortcuts, v)
+            if to_contract and priority > to_contract.front_priority():
+                to_contract.push(v, priority)
+                continue
+            
+            for u, (weight, middle) in remaining[v].items():
+                upward[v].append((u, weight, middle))
+                del remaining[u][v]
+                contracted_neighbors[u] += 1
+            remaining[v] = {}
+            for u, w, cost in shortcuts:
+                if w not in remaining[u] or cost < remaining[u][w][0]:
+                    remaining[u][w] = remaining[w][u] = (cost, v)
+        
+        return upward
+    
+    @staticmethod
+    def _pack_upward(
+        upward: list[list[tuple[int, typing.Any, int]]]
+    ) -> tuple[array[int], array[int], array[typing.Any], array[int]]:
+        """Pack the upward edges into `(offsets, targets, weights, middles)` arrays."""
+        up_offsets = array('q', [0])
+        up_targets = array('q')
+        up_weights: list[typing.Any] = []
+        up_middles = array('q')
+        for edges in upward:
+            for u, weight, middle in edges:
+                up_targets.append(u)
+                up_weights.append(weight)
+                up_middles.append(middle)
+            up_offsets.append(len(up_targets))
+        return up_offsets, up_targets, _pack_weights(up_weights), up_middles
+    
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Save the hierarchy to a binary file, in the same format as `FrozenGraph`."""
+        _save_csr_file(
+            path,
+            self._FILE_MAGIC,
+            self._vertices,
+            (self._offsets, self._targets, self._weights, self._middles),
+        )
+    
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> ContractionHierarchy[_VT, _WT]:
+        """Load a hierarchy saved by `save`. Only load files from sources you trust.
+
+        Raises
+        ------
+        ValueError
+            If the file isn't a saved hierarchy, or was saved by an unsupported version.
+        """
+        vertices, arrays = _load_csr_file(path, cls._FILE_MAGIC, num_extra_arrays=1)
+        offsets, targets, weights, middles = arrays
+        return cls(vertices, offsets, targets, weights, middles)
+    
+    def _unpack(self, start: int, end: int, middle: int) -> list[int]:
+        """Return the original path that the edge from `start` to `end` stands for."""
+        path = [start]
+        # each item is (from, to, middle) for a piece of the path that's still to do,
+        # with the next piece on top
+        stack = [(start, end, middle)]
+        while stack:
+            a, b, middle = stack.pop()
+            if middle < 0:
+                path.append(b)
+                continue
+            # the shortcut a - b stands for a - middle - b, and both of those are
+            # upward edges out of `middle`, since it was contracted first
+            stack.append((middle, b, self._middles[self._upward_edge(middle, b)]))
+            stack.append((a, middle, self._middles[self._upward_edge(middle, a)]))
+        return path
+    
+    def _upward_edge(self, low: int, high: int) -> int:
+        """Return the index of the upward edge from `low` to `high`."""
+        for e in range(self._offsets[low], self._offsets[low + 1]):
+            if self._targets[e] == high:
+                return e
+        raise AssertionError("hierarchy is missing an edge")
+    
+    def shortest_path(self, start: _VT, goal: _VT) -> tuple[list[_VT], float]:
+        """Find the shortest path from `start` to `goal`.
+
+        Returns
+        -------
+        tuple[list[_VT], float]
+            The vertices along the shortest path (including `start` and `goal`), and
+            the total weight of that path. If there is no path, then this is
+            `([], math.inf)`.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the hierarchy.
+        """
+        for v in (start, goal):
+            if v not in self._ids:
+                raise ValueError(f"{v} is not in the hierarchy")
+        best, meeting, parents = self._search(self._ids[start], self._ids[goal])
+        if meeting < 0:
+            return [], math.inf
+        
+        # walk down from the meeting point to each end, unpacking shortcuts on the way
+        halves: list[list[int]] = []
+        for side in (0, 1):
+            half = [meeting]
+            while half[-1] in parents[side]:
+                v = half[-1]
+                source, e = parents[side][v]
+                half.extend(self._unpack(v, source, self._middles[e])[1:])
+            halves.append(half)
+        
+        path = halves[0][::-1] + halves[1][1:]
+        return [self._vertices[v] for v in path], best
+    
+    def _search(
+        self, s: int, t: int
+    ) -> tuple[float, int, tuple[dict[int, tuple[int, int]], ...]]:
+        """Run the upward searches from the vertices with ids `s` and `t`.
+        
+        Returns the shortest distance, the id of the vertex where the two searches met
+        on a shortest path (or -1 if there is no path), and the parents from each side,
+        which map each vertex to the vertex it was reached from and the index of the
+        edge it was reached by.
+        """
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        
+        # index 0 searches up from `s`, index 1 searches up from `t`
+        distances: tuple[dict[int, float], dict[int, float]] = ({s: 0}, {t: 0})
+        parents: tuple[dict[int, tuple[int, int]], ...] = ({}, {})
+        queues = (
+            _IndexedPriorityQueue[int, float]([(s, 0)]),
+            _IndexedPriorityQueue[int, float]([(t, 0)]),
+        )
+        best = math.inf
+        meeting = -1
+        
+        while queues[0] or queues[1]:
+            if not queues[1]:
+                side = 0
+            elif not queues[0]:
+                side = 1
+            else:
+                side = int(queues[1].front_priority() < queues[0].front_priority())
+            if queues[side].front_priority() >= best:
+                break # the other side's front is at least as far, too
+            
+            v = queues[side].pop()
+            dist = distances[side]
+            if v in distances[1 - side] and dist[v] + distances[1 - side][v] < best:
+                best = dist[v] + distances[1 - side][v]
+                meeting = v
+            for e in range(offsets[v], offsets[v + 1]):
+                u = targets[e]
+                distance = dist[v] + weights[e]
+                if u not in dist:
+                    queues[side].push(u, distance)
+                elif distance < dist[u] and u in queues[side]:
+                    queues[side].update(u, distance)
+                else:
+                    continue
+                dist[u] = distance
+                parents[side][u] = (v, e)
+        
+        return best, meeting, parents
+    
+    def distance(self, start: _VT, goal: _VT) -> float:
+        """Return the length of the shortest path from `start` to `goal`.
+
+        Raises
+        ------
+        ValueError
+            If either `start` or `goal` is not in the hierarchy.
+        """
+        return self.shortest_path(start, goal)[1]
+
+class LandmarkOracle(Generic[_VT]):
+    # for each landmark L, the distance from L to every vertex, indexed by vertex id.
+    # by the triangle inequality, |d(L, u) - d(L, v)| <= d(u, v) <= d(L, u) + d(L, v),
+    # so these give cheap bounds on the distance between any two vertices.
+    _ids: dict[_VT, int]
+    _landmarks: list[_VT]
+    _distances: list[array[float]]
+    build_seconds: float
+    
+    def __init__(
+        self,
+        vertices: Sequence[_VT],
+        landmarks: Sequence[_VT],
+        distances: Sequence[array[float]]
+    ) -> None:
+        """Initialize an oracle from its distance tables. Use `build` instead."""
+        self._ids = {v: i for i, v in enumerate(vertices)}
+        self._landmarks = list(landmarks)
+        self._distances = list(distances)
+        self.build_seconds = 0.0
+    
+    @classmethod
+    def build(
+        cls,
+        graph: Graph[_NVT, typing.Any] | FrozenGraph[_NVT, typing.Any],
+        k: int,
+        *,
+        first: _NVT | None = None
+    ) -> LandmarkOracle[_NVT]:
+        """Pick `k` landmarks, and find the distances from each to every vertex.
+        
+        The landmarks are picked by farthest-point selection: after the first one,
+        each landmark is the vertex that is furthest from all the landmarks so far
+        (vertices that can't be reached at all count as infinitely far, so each
+        connected component gets a landmark before any gets two).
+
+        Parameters
+        ----------
+        graph : Graph[_VT, Any] | FrozenGraph[_VT, Any]
+            The graph to find distances in. A `Graph` is frozen first.
+        k : int
+            The number of landmarks. Each costs one run of Dijkstra's algorithm to
+            build, and 8 bytes per vertex to store.
+        first : _VT | None
+            The first landmark. If None, then an arbitrary vertex is used.
+
+        Raises
+        ------
+        ValueError
+            If `k` isn't positive, or if `first` isn't in the graph.
+        """
+        start_time = time.perf_counter()
+        frozen = graph.freeze() if isinstance(graph, Graph) else graph
+        n = len(frozen)
+        if k <= 0:
+            raise ValueError("there must be at least one landmark")
+        if n == 0:
+            return LandmarkOracle[_NVT]([], [], [])
+        
+        landmark = 0 if first is None else frozen.vertex_id(first)
+        landmarks: list[int] = []
+        tables: list[array[float]] = []
+        # distance from each vertex to its closest landmark so far
+        closest = array('d', [math.inf]) * n
+        for _ in range(min(k, n)):
+            landmarks.append(landmark)
+            table = frozen.distance_table(frozen.vertex(landmark))
+            tables.append(table)
+            for v in range(n):
+                closest[v] = min(closest[v], table[v])
+            landmark = max(range(n), key=closest.__getitem__)
+        
+        oracle = LandmarkOracle[_NVT](
+            frozen.vertices, [frozen.vertex(v) for v in landmarks], tables
+        )
+        oracle.build_seconds = time.perf_counter() - start_time
+        return oracle
+    
+    @property
+    def landmarks(self) -> list[_VT]:
+        return list(self._landmarks)
+    
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes taken up by the distance tables."""
+        return sum(table.itemsize * len(table) for table in self._distances)
+    
+    def _vertex_ids(self, u: _VT, v: _VT) -> tuple[int, int]:
+        if u not in self._ids:
+            raise ValueError(f"{u} is not in the graph")
+        if v not in self._ids:
+            raise ValueError(f"{v} is not in the graph")
+        return self._ids[u], self._ids[v]
+    
+    def lower_bound(self, u: _VT, v: _VT, /) -> float:
+        """Return a lower bound on the distance between `u` and `v`, in O(k) time.
+        
+        This never overestimates, so it can be passed to `Graph.a_star` as the
+        heuristic (which is called ALT search: A*, landmarks, triangle inequality).
+
+        Raises
+        ------
+        ValueError
+            If either vertex is not in the graph.
+        """
+        i, j = self._vertex_ids(u, v)
+        bound = 0.0
+        for table in self._distances:
+            du, dv = table[i], table[j]
+            if du == dv: # also covers both being unreachable from this landmark
+                continue
+            bound = max(bound, abs(du - dv))
+        return bound
+    
+    def upper_bound(self, u: _VT, v: _VT, /) -> float:
+        """Return an upper bound on the distance between `u` and `v`, in O(k) time.
+
+        Raises
+        ------
+        ValueError
+            If either vertex is not in the graph.
+        """
+        i, j = self._vertex_ids(u, v)
+        if i == j:
+            return 0
+        return min(table[i] + table[j] for table in self._distances)
+    
+    def approximate_distance(self, u: _VT, v: _VT, /) -> float:
+        """Estimate the distance between `u` and `v` without searching, in O(k) time.
+        
+        This is the upper bound, i.e. the length of the shortest path through any of
+        the landmarks, which is exact whenever some landmark is on a shortest path.
+
+        Raises
+        ------
+        ValueError
+            If either vertex is not in the graph.
+        """
+        return self.upper_bound(u, v)
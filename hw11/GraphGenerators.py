@@ -0,0 +1,104 @@
+"""Seeded generators of synthetic graphs, for benchmarks and demos.
+
+Each generator takes a number of vertices and a `random.Random`, and returns the
+vertices and the weighted edges of a graph, in the form the `Graph` constructor takes.
+"""
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import random
+    from collections.abc import Callable
+
+EdgeList = list[tuple[tuple[int, int], int]]
+
+MAX_WEIGHT = 100
+
+def grid_graph(n: int, rng: random.Random) -> tuple[range, EdgeList]:
+    """Generate a square grid with about `n` vertices, like a street map."""
+    side = max(1, math.isqrt(n))
+    edges: EdgeList = []
+    for x in range(side):
+        for y in range(side):
+            v = x * side + y
+            if x + 1 < side:
+                edges.append(((v, v + side), rng.randint(1, MAX_WEIGHT)))
+            if y + 1 < side:
+                edges.append(((v, v + 1), rng.randint(1, MAX_WEIGHT)))
+    return range(side * side), edges
+
+def erdos_renyi_graph(
+    n: int,
+    rng: random.Random,
+    average_degree: float = 4
+) -> tuple[range, EdgeList]:
+    """Generate a graph where each edge is equally likely, with the given degree."""
+    num_edges = int(n * average_degree / 2)
+    edges: EdgeList = [
+        ((rng.randrange(n), rng.randrange(n)), rng.randint(1, MAX_WEIGHT))
+        for _ in range(num_edges)
+    ]
+    return range(n), edges
+
+def barabasi_albert_graph(
+    n: int,
+    rng: random.Random,
+    m: int = 2
+) -> tuple[range, EdgeList]:
+    """Generate a scale-free graph by preferential attachment.
+
+    Each new vertex connects to `m` existing ones, picked with probability
+    proportional to their degree, like a social network.
+    """
+    edges: EdgeList = []
+    # every vertex shows up in here once per edge it has, so picking uniformly from
+    # this list picks vertices proportionally to their degree
+    endpoints: list[int] = list(range(min(m, n)))
+    for v in range(m, n):
+        targets = {rng.choice(endpoints) for _ in range(m)}
+        for u in targets:
+            edges.append(((u, v), rng.randint(1, MAX_WEIGHT)))
+            endpoints.extend((u, v))
+    return range(n), edges
+
+def geometric_graph(
+    n: int,
+    rng: random.Random,
+    average_degree: float = 6
+) -> tuple[range, EdgeList]:
+    """Generate a random geometric graph in the unit square.
+
+    Each vertex is a random point, connected to every point within a radius picked
+    to give about the given degree, with weights proportional to the distance.
+    """
+    radius = math.sqrt(average_degree / (math.pi * max(n, 1)))
+    points = [(rng.random(), rng.random()) for _ in range(n)]
+
+    # bucket the points into cells of the same size as the radius, so that only
+    # points in neighboring cells need to be compared
+    cells: dict[tuple[int, int], list[int]] = {}
+    for v, (x, y) in enumerate(points):
+        cells.setdefault((int(x / radius), int(y / radius)), []).append(v)
+
+    edges: EdgeList = []
+    for (cx, cy), members in cells.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for v in members:
+                    for u in cells.get((cx + dx, cy + dy), ()):
+                        if u <= v:
+                            continue
+                        distance = math.dist(points[u], points[v])
+                        if distance <= radius:
+                            weight = 1 + int(distance / radius * (MAX_WEIGHT - 1))
+                            edges.append(((u, v), weight))
+    return range(n), edges
+
+GENERATORS: dict[str, Callable[[int, random.Random], tuple[range, EdgeList]]] = {
+    'grid': grid_graph,
+    'erdos_renyi': erdos_renyi_graph,
+    'barabasi_albert': barabasi_albert_graph,
+    'geometric': geometric_graph,
+}
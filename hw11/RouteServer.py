@@ -0,0 +1,434 @@
+"""An asyncio HTTP front end for shortest path queries on a `Graph`.
+
+The server answers
+
+    GET /route?source=S&target=T    the shortest path from S to T and its length
+    GET /distances?source=S         the distance from S to everything it can reach
+    GET /stats                      how many requests and searches there have been
+
+with JSON. Searches run in a pool of worker processes (each with its own frozen copy
+of the graph), so the event loop is never stuck on one, and any requests with the
+same source that come in while a search from that source is running wait for that
+one search instead of starting their own. The results of the most recent searches
+are kept around too, since the graph the server answers about never changes.
+
+Run this as a script to start a server on a random graph, hit it with concurrent
+requests, and print the latency and throughput as JSON.
+
+    python RouteServer.py --size 10000 --requests 2000 --concurrency 64
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import math
+import random
+import sys
+import time
+import typing
+import urllib.parse
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Generic, TypeVar
+
+from Graph import (
+    FrozenGraph,
+    Graph,
+    ResultCache,
+    init_worker,
+    path_from_tree,
+    worker_shortest_paths,
+)
+from GraphGenerators import GENERATORS
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+_VT = TypeVar("_VT", bound=typing.Hashable)
+
+SearchResult = tuple[dict[_VT, _VT], dict[_VT, float]]
+
+class _BadRequestError(Exception):
+    # turned into an HTTP error response, instead of the connection being dropped
+    status: int
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+def _http_response(status: int, body: object, *, keep_alive: bool) -> bytes:
+    """Build an HTTP/1.1 response with a JSON body."""
+    content = json.dumps(body).encode()
+    head = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + content
+
+class RouteServer(Generic[_VT]):
+    # _in_flight maps each source that's being searched from right now to the task
+    # doing it, so that other requests for the same source can wait on it too
+    _graph: FrozenGraph[_VT, typing.Any]
+    _vertex_type: Callable[[str], _VT]
+    _workers: int | None
+    _executor: Executor | None
+    _server: asyncio.Server | None
+    _in_flight: dict[_VT, asyncio.Task[SearchResult[_VT]]]
+    _results: ResultCache[SearchResult[_VT]]
+    # each open connection and the task handling it, so that they can be wrapped up
+    # when the server closes
+    _connections: dict[asyncio.StreamWriter, asyncio.Task[typing.Any]]
+    requests: int
+    computations: int
+
+    def __init__(
+        self,
+        graph: Graph[_VT, typing.Any],
+        *,
+        vertex_type: Callable[[str], _VT] = str,
+        workers: int | None = None,
+        cache_size: int | None = 16
+    ) -> None:
+        """Create a server for shortest path queries on `graph`.
+
+        Parameters
+        ----------
+        graph : Graph[_VT, Any]
+            The graph to answer queries about. The server takes a frozen copy of it,
+            so later changes to the graph aren't seen.
+        vertex_type : Callable[[str], _VT]
+            How to turn a vertex in a query string into an actual vertex.
+        workers : int | None
+            The number of worker processes to run searches in, or None for one per
+            CPU. If this is 1, searches run in a thread of this process instead.
+        cache_size : int | None
+            How many sources to keep the finished search results of, or None for no
+            limit. Each result holds a distance and a parent for every vertex, so
+            this is kept small by default.
+        """
+        self._graph = graph.freeze()
+        self._vertex_type = vertex_type
+        self._workers = workers
+        self._executor = None
+        self._server = None
+        self._in_flight = {}
+        self._results = ResultCache[SearchResult[_VT]](cache_size)
+        self._connections = {}
+        self.requests = 0
+        self.computations = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> tuple[str, int]:
+        """Start the workers and listen for connections.
+
+        Returns
+        -------
+        tuple[str, int]
+            The address the server is listening on. With `port=0`, a free port is
+            picked, and this is how to find out which.
+        """
+        if self._workers == 1:
+            self._executor = ThreadPoolExecutor(1)
+        else:
+            self._executor = ProcessPoolExecutor(
+                self._workers, initializer=init_worker, initargs=(self._graph,)
+            )
+        self._server = await asyncio.start_server(self._handle, host, port)
+        address = self._server.sockets[0].getsockname()
+        return address[0], address[1]
+
+    async def close(self) -> None:
+        """Stop listening, and shut down the workers."""
+        if self._server is not None:
+            self._server.close()
+            # closing the connections makes their handlers see the end of the stream
+            for writer in self._connections:
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            # waiting for running searches to finish would block the event loop, so
+            # do it on a thread
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(executor.shutdown, cancel_futures=True)
+            )
+
+    async def __aenter__(self) -> RouteServer[_VT]:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """The address the server is listening on."""
+        if self._server is None:
+            raise RuntimeError("the server isn't running")
+        address = self._server.sockets[0].getsockname()
+        return address[0], address[1]
+
+    async def _search(self, source: _VT) -> SearchResult[_VT]:
+        loop = asyncio.get_running_loop()
+        if isinstance(self._executor, ThreadPoolExecutor):
+            return await loop.run_in_executor(
+                self._executor, self._graph.shortest_paths, source
+            )
+        _, result = await loop.run_in_executor(
+            self._executor, worker_shortest_paths, source
+        )
+        return result
+
+    async def shortest_paths(self, source: _VT) -> SearchResult[_VT]:
+        """Return `shortest_paths` from `source`, sharing the search with other callers.
+
+        If a search from `source` is already running, this waits for that search
+        instead of starting another one, and if one finished recently, this just
+        returns its result.
+
+        Raises
+        ------
+        ValueError
+            If the `source` vertex is not in the graph.
+        """
+        # not `source in self._graph`, which would take a 2-tuple vertex for an edge
+        self._graph.vertex_id(source)
+        self.requests += 1
+        # the graph never changes, so there's only ever one version of it to cache
+        with contextlib.suppress(KeyError):
+            return self._results.get(source, 0)
+        task = self._in_flight.get(source)
+        if task is None:
+            self.computations += 1
+            task = asyncio.create_task(self._search(source))
+            self._in_flight[source] = task
+            task.add_done_callback(lambda _: self._finish(source, task))
+        # shielded so that one caller going away doesn't cancel everyone else's search
+        return await asyncio.shield(task)
+
+    def _finish(self, source: _VT, task: asyncio.Task[SearchResult[_VT]]) -> None:
+        del self._in_flight[source]
+        if not task.cancelled() and task.exception() is None:
+            self._results.put(source, 0, task.result())
+
+    def stats(self) -> dict[str, int]:
+        """Return how many searches were asked for, and how they were answered.
+
+        Every request either started a search ('computations'), used a recent result
+        ('cache_hits'), or waited on a search that was already running ('coalesced').
+        """
+        return {
+            'requests': self.requests,
+            'computations': self.computations,
+            'cache_hits': self._results.hits,
+            'coalesced': self.requests - self.computations - self._results.hits,
+            'in_flight': len(self._in_flight),
+        }
+
+    def _vertex(self, query: dict[str, list[str]], name: str) -> _VT:
+        if name not in query:
+            raise _BadRequestError(400, f"missing the {name!r} parameter")
+        try:
+            vertex = self._vertex_type(query[name][0])
+        except ValueError as e:
+            raise _BadRequestError(400, f"bad {name!r} parameter: {e}") from None
+        try:
+            self._graph.vertex_id(vertex)
+        except ValueError:
+            raise _BadRequestError(404, f"{vertex} is not in the graph") from None
+        return vertex
+
+    async def _respond(self, request_line: str) -> dict[str, typing.Any]:
+        try:
+            method, target, _ = request_line.split()
+        except ValueError:
+            raise _BadRequestError(400, "malformed request line") from None
+        if method != 'GET':
+            raise _BadRequestError(405, f"{method} isn't supported")
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+
+        if url.path == '/stats':
+            return self.stats()
+        if url.path == '/route':
+            source, goal = self._vertex(query, 'source'), self._vertex(query, 'target')
+            tree, distances = await self.shortest_paths(source)
+            if distances.get(goal, math.inf) == math.inf:
+                raise _BadRequestError(404, f"there's no path from {source} to {goal}")
+            return {
+                'source': source,
+                'target': goal,
+                'distance': distances[goal],
+                'path': path_from_tree(tree, source, goal),
+            }
+        if url.path == '/distances':
+            source = self._vertex(query, 'source')
+            _, distances = await self.shortest_paths(source)
+            return {
+                'source': source,
+                'distances': {
+                    str(v): d for v, d in distances.items() if d < math.inf
+                },
+            }
+        raise _BadRequestError(404, f"there's nothing at {url.path}")
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        # one connection, which can send any number of requests one after another
+        self._connections[writer] = asyncio.current_task() # pyright: ignore[reportArgumentType]
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                try:
+                    body = await self._respond(request_line.decode('latin-1'))
+                    status = 200
+                except _BadRequestError as e:
+                    status, body = e.status, {'error': str(e)}
+                except Exception as e:
+                    # a bug (or a worker dying) shouldn't take the connection with it
+                    status, body = 500, {'error': f"{type(e).__name__}: {e}"}
+                writer.write(_http_response(status, body, keep_alive=keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+async def fetch(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    path: str
+) -> tuple[int, typing.Any]:
+    """Send a GET request over an open connection, and return the status and JSON."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+def _percentile(ordered: Sequence[float], p: float) -> float:
+    """Return the `p`th percentile (nearest rank) of some already sorted numbers."""
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+async def load_test(
+    host: str,
+    port: int,
+    paths: Sequence[str],
+    *,
+    concurrency: int = 32
+) -> dict[str, typing.Any]:
+    """Request every path from a server, over `concurrency` connections at once.
+
+    Returns
+    -------
+    dict[str, Any]
+        How long it took overall, the throughput in requests per second, the
+        latency percentiles in milliseconds, and how many responses weren't 200s.
+    """
+    pending = iter(paths)
+    latencies: list[float] = []
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for path in pending: # shared, so each path is only requested once
+                start = time.perf_counter()
+                status, _ = await fetch(reader, writer, path)
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'errors': errors,
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': _percentile(latencies, 50) * 1000,
+        'p99_ms': _percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+async def _run(args: argparse.Namespace) -> dict[str, typing.Any]:
+    rng = random.Random(args.seed)
+    vertices, edges = GENERATORS[args.generator](args.size, rng)
+    graph = Graph[int, int](vertices, edges)
+
+    # a few popular sources, like a few busy airports, so that requests pile up
+    sources = rng.sample(range(len(graph)), min(args.sources, len(graph)))
+    paths = [
+        f"/route?source={rng.choice(sources)}&target={rng.randrange(len(graph))}"
+        for _ in range(args.requests)
+    ]
+    server = RouteServer(
+        graph, vertex_type=int, workers=args.workers, cache_size=args.cache_size
+    )
+    async with server:
+        host, port = server.address
+        report = await load_test(host, port, paths, concurrency=args.concurrency)
+        stats = server.stats()
+    for name in ('computations', 'cache_hits', 'coalesced'):
+        report[name] = stats[name]
+    report.update(generator=args.generator, vertices=len(graph), workers=args.workers)
+    return report
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='grid')
+    parser.add_argument('--size', type=int, default=10_000)
+    parser.add_argument('--requests', type=int, default=2_000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--sources', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-size', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=2050)
+    args = parser.parse_args(argv)
+
+    json.dump(asyncio.run(_run(args)), sys.stdout, indent=2)
+    print()
+
+if __name__ == '__main__':
+    main()
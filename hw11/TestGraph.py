@@ -1,6 +1,25 @@
+import fractions
+import itertools
+import math
+import pathlib
+import random
+import tempfile
+import threading
 import unittest
 
-from Graph import Graph
+from Graph import (
+    ContractionHierarchy,
+    DynamicShortestPaths,
+    EdgeFileOptions,
+    FrozenGraph,
+    Graph,
+    LandmarkOracle,
+    SearchStats,
+    SpanningTree,
+    _IndexedPriorityQueue,  # pyright: ignore[reportPrivateUsage]
+    euclidean_distance,
+    manhattan_distance,
+)
 
 
 class test_Graph(unittest.TestCase): # noqa: N801
@@ -23,6 +42,15 @@ class test_Graph(unittest.TestCase): # noqa: N801
         self.assertEqual(len(self.g), 5)
         self.assertEqual(len(Graph[int, int]()), 0)
     
+    def test_num_edges(self) -> None:
+        """Test the `num_edges` property of the `Graph` class."""
+        self.assertEqual(self.g.num_edges, 6)
+        self.g.add_edge(5, 5, 1)
+        self.assertEqual(self.g.num_edges, 7)
+        self.assertEqual(self.g.snapshot().num_edges, 7)
+        self.g.remove_vertex(3)
+        self.assertEqual(self.g.num_edges, 3)
+    
     def test_contains(self) -> None:
         """Test the `__contains__` method of the `Graph` class."""
         self.assertIn(1, self.g)
@@ -63,6 +91,8 @@ class test_Graph(unittest.TestCase): # noqa: N801
         self.assertNotIn(3, self.g)
         self.assertEqual(len(self.g), 4)
         self.assertNotIn((3, 4), self.g)
+        self.assertEqual({n for n, _ in self.g.neighbors(4)}, {5})
+        self.assertEqual({n for n, _ in self.g.neighbors(1)}, {2})
     
     def test_add_edge(self) -> None:
         """Test the `add_edge` method of the `Graph` class."""
@@ -77,6 +107,93 @@ class test_Graph(unittest.TestCase): # noqa: N801
         self.g.remove_edge(3, 4)
         self.assertNotIn((3, 4), self.g)
         self.assertNotIn((4, 3), self.g)
+        self.assertNotIn(4, {n for n, _ in self.g.neighbors(3)})
+        with self.assertRaises(ValueError):
+            self.g.remove_edge(3, 4)
+    
+    def test_add_edges(self) -> None:
+        """Test the `add_edges` method of the `Graph` class."""
+        self.assertEqual(self.g.add_edges([((1, 5), 4), ((2, 4), 0)]), 2)
+        self.assertEqual(self.g.weight(5, 1), 4)
+        self.assertIn(2, {n for n, _ in self.g.neighbors(4)})
+        
+        # nothing is added if any of the edges are bad
+        with self.assertRaises(ValueError):
+            self.g.add_edges([((1, 4), 1), ((1, 6), 1)])
+        with self.assertRaises(ValueError):
+            self.g.add_edges([((1, 4), 1), ((2, 5), -1)])
+        self.assertNotIn((1, 4), self.g)
+    
+    def test_remove_edges(self) -> None:
+        """Test the `remove_edges` method of the `Graph` class."""
+        self.assertEqual(self.g.remove_edges([(1, 2), (3, 4), (2, 1)]), 2)
+        self.assertNotIn((1, 2), self.g)
+        self.assertNotIn((4, 3), self.g)
+        self.assertEqual({n for n, _ in self.g.neighbors(3)}, {1, 2, 5})
+        
+        with self.assertRaises(ValueError):
+            self.g.remove_edges([(1, 3), (1, 2)])
+        self.assertIn((1, 3), self.g)
+    
+    def test_interning(self) -> None:
+        """Test that each vertex is only stored once, however it was given."""
+        names = ['LAX-' + 'x' * 50, 'JFK-' + 'x' * 50, 'SFO-' + 'x' * 50]
+        g = Graph[str, int](names)
+        
+        def copy(name: str) -> str:
+            return (name + '.')[:-1] # equal, but a different object
+        
+        g.add_edge(copy(names[0]), copy(names[1]), 1)
+        g.add_edges([((copy(names[1]), copy(names[2])), 2)])
+        for v in g:
+            for u, _ in g.neighbors(v):
+                self.assertTrue(any(u is name for name in names))
+        
+        # ids of removed vertices get reused without mixing up edges
+        g.remove_vertex(copy(names[1]))
+        self.assertNotIn((names[0], names[1]), g)
+        g.add_vertex('ORD')
+        g.add_edge('ORD', names[2], 3)
+        self.assertEqual(g.weight(names[2], 'ORD'), 3)
+        self.assertNotIn((names[0], 'ORD'), g)
+        self.assertNotIn((names[0], names[2]), g)
+        self.assertNotIn((names[0], [1, 2]), g)
+        self.assertEqual(sum(tree.weight for tree in g.minimum_spanning_forest()), 3)
+        
+        # the packed keys never leak out of the edge weight dict
+        edge_weights = g._edge_weights # pyright: ignore[reportPrivateUsage]
+        self.assertEqual(list(edge_weights.keys()), list(edge_weights))
+        self.assertEqual(
+            {frozenset(edge) for edge in edge_weights}, {frozenset(('ORD', names[2]))}
+        )
+    
+    def test_from_edge_file(self) -> None:
+        """Test the `from_edge_file` class method of the `Graph` class."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / 'edges.txt'
+            path.write_text(
+                "# u v weight\n1 2 1\n2,3,1\n\n1 3 2\n3\t4\n3 5 3\n4, 5, 2\n"
+            )
+            for use_mmap in (False, True):
+                with self.subTest(use_mmap=use_mmap):
+                    g = Graph.from_edge_file(
+                        path,
+                        vertex_type=int,
+                        weight_type=int,
+                        options=EdgeFileOptions(use_mmap=use_mmap),
+                    )
+                    self.assertEqual(set(g), set(self.g))
+                    for u in g:
+                        self.assertEqual(
+                            dict(g.neighbors(u)), dict(self.g.neighbors(u))
+                        )
+            
+            path.write_text("1 2 3 4\n")
+            for use_mmap in (False, True):
+                with self.assertRaises(ValueError):
+                    Graph.from_edge_file(
+                        path, options=EdgeFileOptions(use_mmap=use_mmap)
+                    )
     
     def test_weight(self) -> None:
         """Test the `weight` method of the `Graph` class."""
@@ -94,9 +211,298 @@ class test_Graph(unittest.TestCase): # noqa: N801
         self.assertEqual({n for n, _ in self.g.neighbors(3)}, {1, 2, 4, 5})
         self.assertEqual({n for n, _ in self.g.neighbors(4)}, {3, 5})
         self.assertEqual({n for n, _ in self.g.neighbors(5)}, {3, 4})
+        self.assertEqual(dict(self.g.neighbors(3)), {1: 2, 2: 1, 4: 1, 5: 3})
         with self.assertRaises(ValueError):
             set(self.g.neighbors(6))
 
+class test_FrozenGraph(unittest.TestCase): # noqa: N801
+    def setUp(self) -> None:
+        """Create a graph `self.g` and its frozen snapshot `self.f`."""
+        self.g = Graph[int, int]( # pyright: ignore[reportUninitializedInstanceVariable]
+            vertices = [1, 2, 3, 4, 5, 6],
+            edge_weights = [
+                ((1, 2), 7),
+                ((1, 3), 9),
+                ((1, 6), 14),
+                ((2, 3), 10),
+                ((2, 4), 15),
+                ((3, 4), 11),
+                ((3, 6), 2),
+                ((4, 5), 6),
+                ((5, 6), 9),
+            ]
+        )
+        self.f = self.g.freeze() # pyright: ignore[reportUninitializedInstanceVariable]
+    
+    def test_contents(self) -> None:
+        """Test that the snapshot has the same vertices, edges and weights."""
+        self.assertEqual(len(self.f), 6)
+        self.assertEqual(set(self.f), set(self.g))
+        self.assertIn((4, 2), self.f)
+        self.assertNotIn((1, 5), self.f)
+        self.assertNotIn(7, self.f)
+        self.assertEqual(self.f.weight(2, 4), 15)
+        self.assertEqual(dict(self.f.neighbors(3)), dict(self.g.neighbors(3)))
+        self.assertEqual(self.f.vertex(self.f.vertex_id(5)), 5)
+        with self.assertRaises(ValueError):
+            self.f.weight(1, 5)
+        with self.assertRaises(ValueError):
+            self.f.neighbors(7)
+    
+    def test_thaw(self) -> None:
+        """Test that thawing a snapshot gives back an equivalent graph."""
+        g = self.f.thaw()
+        self.assertEqual(set(g), set(self.g))
+        for v in g:
+            self.assertEqual(dict(g.neighbors(v)), dict(self.g.neighbors(v)))
+        self.assertEqual(g.weight(4, 2), 15)
+        self.assertEqual(g.num_edges, self.g.num_edges)
+        g.add_edge(1, 5, 1)
+        self.assertNotIn((1, 5), self.f)
+        
+        # the thawed graph's interned ids work like any other graph's
+        g.remove_vertex(2)
+        g.add_vertex(8)
+        g.add_edge(8, 4, 2)
+        self.assertEqual(g.weight(4, 8), 2)
+        self.assertNotIn((8, 1), g)
+        self.assertEqual(g.num_edges, 8)
+    
+    def test_direction_optimizing_bfs(self) -> None:
+        """Test that direction-optimizing BFS agrees with plain BFS."""
+        rng = random.Random(2050)
+        g = Graph[int, int](range(500))
+        g.add_edges(((rng.randrange(500), rng.randrange(500)), 1) for _ in range(5000))
+        g.add_vertex(500)
+        f = g.freeze()
+        
+        prev, num_edges, report = f.direction_optimizing_bfs(0)
+        self.assertEqual(num_edges, g.paths_with_fewest_edges(0)[1])
+        self.assertNotIn(500, num_edges)
+        for v, u in prev.items():
+            self.assertEqual(num_edges[v], num_edges[u] + 1)
+            self.assertIn((u, v), g)
+        
+        self.assertGreater(report.bottom_up_levels, 0)
+        self.assertGreater(report.edges_saved, 0)
+        self.assertEqual(
+            f.paths_with_fewest_edges(0, direction_optimizing=True), (prev, num_edges)
+        )
+        
+        _, num_edges, _ = self.f.direction_optimizing_bfs(5)
+        self.assertEqual(num_edges, self.g.paths_with_fewest_edges(5)[1])
+    
+    def test_save_load(self) -> None:
+        """Test that saving and loading a graph gives back an equivalent graph."""
+        self.g.add_vertex(7)
+        self.g.add_edge(7, 7, 3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / 'graph.bin'
+            self.g.save(path)
+            
+            f = FrozenGraph[int, int].load(path)
+            self.assertEqual(f.shortest_paths(1), self.g.shortest_paths(1))
+            
+            g = Graph.load(path)
+            self.assertEqual(set(g), set(self.g))
+            for v in g:
+                self.assertEqual(dict(g.neighbors(v)), dict(self.g.neighbors(v)))
+            self.assertEqual(g.weight(7, 7), 3)
+            
+            floats = Graph[str, float](['a', 'b'], [(('a', 'b'), 0.5)])
+            floats.save(path)
+            self.assertEqual(Graph.load(path).weight('b', 'a'), 0.5)
+            
+            path.write_bytes(b'not a graph at all, no sir')
+            with self.assertRaises(ValueError):
+                Graph.load(path)
+            
+            # the header is 40 bytes, so these break the pickled vertex table
+            self.g.save(path)
+            data = path.read_bytes()
+            for broken in (data[:42], data[:40] + bytes(len(data) - 40)):
+                path.write_bytes(broken)
+                with self.assertRaises(ValueError):
+                    Graph.load(path)
+
+    def test_weight_types(self) -> None:
+        """Test that weights that can't be stored exactly aren't frozen."""
+        mixed = Graph[str, float](['a', 'b', 'c'], [(('a', 'b'), 1), (('b', 'c'), 0.5)])
+        self.assertEqual(mixed.freeze().weight('a', 'b'), 1.0)
+        
+        fraction = Graph[str, fractions.Fraction](
+            ['a', 'b'], [(('a', 'b'), fractions.Fraction(1, 3))]
+        )
+        with self.assertRaises(TypeError):
+            fraction.freeze()
+        with self.assertRaises(TypeError):
+            Graph[str, bool](['a', 'b'], [(('a', 'b'), True)]).freeze()
+        for weights in ([2 ** 70], [2 ** 60 + 1, 0.5]):
+            with self.subTest(weights=weights):
+                g = Graph[int, float](range(3), [
+                    ((0, i + 1), weight) for i, weight in enumerate(weights)
+                ])
+                with self.assertRaises(ValueError):
+                    g.freeze()
+    
+    def test_snapshot_is_independent(self) -> None:
+        """Test that changing the graph doesn't change an existing snapshot."""
+        self.g.remove_edge(1, 2)
+        self.g.add_vertex(7)
+        self.assertIn((1, 2), self.f)
+        self.assertNotIn(7, self.f)
+    
+    def test_algorithms(self) -> None:
+        """Test that the traversals on the snapshot agree with the ones on the graph."""
+        self.g.add_vertex(7)
+        f = self.g.freeze()
+        self.assertEqual(
+            f.paths_with_fewest_edges(1), self.g.paths_with_fewest_edges(1)
+        )
+        self.assertEqual(f.shortest_paths(1), self.g.shortest_paths(1))
+        self.assertEqual(f.minimum_spanning_tree(1), self.g.minimum_spanning_tree(1))
+
+class test_ContractionHierarchy(unittest.TestCase): # noqa: N801
+    def setUp(self) -> None:
+        """Create a random graph `self.g` and its contraction hierarchy `self.ch`."""
+        rng = random.Random(2050)
+        self.g = Graph[int, int](range(80)) # pyright: ignore[reportUninitializedInstanceVariable]
+        for _ in range(200):
+            self.g.add_edge(rng.randrange(80), rng.randrange(80), rng.randrange(20))
+        self.ch = ContractionHierarchy.build(self.g) # pyright: ignore[reportUninitializedInstanceVariable]
+    
+    def check_against_dijkstra(self, ch: ContractionHierarchy[int, int]) -> None:
+        """Check that `ch` gives the same answers as `shortest_paths`."""
+        for start in range(0, 80, 9):
+            _, distances = self.g.shortest_paths(start)
+            for goal in range(80):
+                path, cost = ch.shortest_path(start, goal)
+                self.assertEqual(cost, distances[goal])
+                if cost == math.inf:
+                    self.assertEqual(path, [])
+                    continue
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                self.assertEqual(
+                    sum(self.g.weight(u, v) for u, v in itertools.pairwise(path)), cost
+                )
+    
+    def test_shortest_path(self) -> None:
+        """Test the `shortest_path` method of the `ContractionHierarchy` class."""
+        self.assertEqual(len(self.ch), 80)
+        self.check_against_dijkstra(self.ch)
+        # giving up on witness searches right away only adds extra shortcuts
+        sloppy = ContractionHierarchy.build(self.g, witness_limit=1)
+        self.assertGreaterEqual(sloppy.num_shortcuts, self.ch.num_shortcuts)
+        self.check_against_dijkstra(sloppy)
+        with self.assertRaises(ValueError):
+            self.ch.distance(0, 80)
+    
+    def test_save_load(self) -> None:
+        """Test that saving and loading a hierarchy gives the same answers."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / 'graph.ch'
+            self.ch.save(path)
+            self.check_against_dijkstra(ContractionHierarchy[int, int].load(path))
+            
+            self.g.save(path)
+            with self.assertRaises(ValueError):
+                ContractionHierarchy.load(path)
+
+class test_LandmarkOracle(unittest.TestCase): # noqa: N801
+    def setUp(self) -> None:
+        """Create a weighted grid graph `self.g` to use in other unittests."""
+        rng = random.Random(2050)
+        self.g = Graph[tuple[int, int], int]( # pyright: ignore[reportUninitializedInstanceVariable]
+            (x, y) for x in range(15) for y in range(15)
+        )
+        for x in range(15):
+            for y in range(15):
+                if x + 1 < 15:
+                    self.g.add_edge((x, y), (x + 1, y), rng.randrange(1, 10))
+                if y + 1 < 15:
+                    self.g.add_edge((x, y), (x, y + 1), rng.randrange(1, 10))
+    
+    def test_bounds(self) -> None:
+        """Test that the bounds from the oracle are actually bounds."""
+        oracle = LandmarkOracle.build(self.g, 4, first=(0, 0))
+        self.assertEqual(len(oracle.landmarks), 4)
+        self.assertEqual(oracle.landmarks[0], (0, 0))
+        self.assertEqual(oracle.nbytes, 4 * 8 * 225)
+        
+        _, distances = self.g.shortest_paths((3, 4))
+        for v, distance in distances.items():
+            self.assertLessEqual(oracle.lower_bound((3, 4), v), distance)
+            self.assertGreaterEqual(oracle.upper_bound((3, 4), v), distance)
+            self.assertEqual(
+                oracle.approximate_distance((3, 4), v), oracle.upper_bound(v, (3, 4))
+            )
+        for landmark in oracle.landmarks:
+            self.assertEqual(oracle.lower_bound((3, 4), landmark), distances[landmark])
+        
+        with self.assertRaises(ValueError):
+            oracle.lower_bound((3, 4), (15, 15))
+        with self.assertRaises(ValueError):
+            LandmarkOracle.build(self.g, 0)
+    
+    def test_alt_search(self) -> None:
+        """Test using the oracle as the heuristic for A* search."""
+        oracle = LandmarkOracle.build(self.g, 4)
+        _, cost, dijkstra_expanded = self.g.a_star((0, 7), (14, 7), lambda v, goal: 0)
+        _, alt_cost, alt_expanded = self.g.a_star((0, 7), (14, 7), oracle.lower_bound)
+        self.assertEqual(alt_cost, cost)
+        self.assertLess(alt_expanded, dijkstra_expanded)
+    
+    def test_disconnected(self) -> None:
+        """Test that every component gets a landmark before any gets two."""
+        the_moon = (384_400, 0)
+        self.g.add_vertex(the_moon)
+        oracle = LandmarkOracle.build(self.g, 2, first=(0, 0))
+        self.assertEqual(oracle.landmarks, [(0, 0), the_moon])
+        self.assertEqual(oracle.lower_bound((0, 0), the_moon), math.inf)
+
+class test_IndexedPriorityQueue(unittest.TestCase): # noqa: N801
+    def setUp(self) -> None:
+        """Create a priority queue `self.pq` to use in other unittests."""
+        self.pq = _IndexedPriorityQueue[str, int]( # pyright: ignore[reportUninitializedInstanceVariable]
+            [('e', 5), ('d', 4), ('c', 3), ('b', 2), ('a', 1)]
+        )
+    
+    def test_pop_order(self) -> None:
+        """Test that items come out of the priority queue in priority order."""
+        self.assertEqual([self.pq.pop() for _ in range(5)], ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(len(self.pq), 0)
+    
+    def test_contains(self) -> None:
+        """Test the `__contains__` method of the `_IndexedPriorityQueue` class."""
+        self.assertIn('c', self.pq)
+        self.assertNotIn('z', self.pq)
+        self.assertNotIn([], self.pq)
+        self.pq.pop()
+        self.assertNotIn('a', self.pq)
+    
+    def test_update(self) -> None:
+        """Test the `update` method of the `_IndexedPriorityQueue` class."""
+        self.pq.update('e', 0)
+        self.assertEqual(self.pq.front(), 'e')
+        self.pq.update('e', 10)
+        self.assertEqual([self.pq.pop() for _ in range(5)], ['a', 'b', 'c', 'd', 'e'])
+        with self.assertRaises(ValueError):
+            self.pq.update('z', 0)
+    
+    def test_remove(self) -> None:
+        """Test the `remove` method of the `_IndexedPriorityQueue` class."""
+        self.pq.remove('b')
+        self.pq.remove('a')
+        self.assertNotIn('b', self.pq)
+        self.assertEqual([self.pq.pop() for _ in range(3)], ['c', 'd', 'e'])
+        with self.assertRaises(ValueError):
+            self.pq.remove('a')
+    
+    def test_push_duplicate(self) -> None:
+        """Test that pushing an item twice raises a `ValueError`."""
+        with self.assertRaises(ValueError):
+            self.pq.push('a', 0)
+
 class test_GraphTraversal(unittest.TestCase): # noqa: N801
     def setUp(self) -> None:
         """Create a graph `self.g` to use in other unittests."""
@@ -145,6 +551,81 @@ class test_GraphTraversal(unittest.TestCase): # noqa: N801
             {2: 1, 3: 2, 4: 3, 5: 4},
         )
     
+    def test_kruskals_algorithm(self) -> None:
+        """Test the `minimum_spanning_forest` method of the `Graph` class."""
+        (tree,) = self.g.minimum_spanning_forest()
+        self.assertEqual(tree.vertices, set(self.g))
+        self.assertEqual(len(tree.edges), len(self.g) - 1)
+        self.assertEqual(
+            tree.weight, sum(self.g.minimum_spanning_tree('my house')[1].values())
+        )
+        
+        self.g.add_vertex('the moon')
+        self.g.add_vertex('the sun')
+        self.g.add_edge('the moon', 'the sun', 3.0)
+        self.g.add_edge('the moon', 'the moon', 0.0)
+        self.g.add_vertex('pluto')
+        forest = sorted(
+            self.g.minimum_spanning_forest(), key=lambda tree: len(tree.vertices)
+        )
+        self.assertEqual(
+            [(tree.vertices, tree.weight) for tree in forest],
+            [
+                ({'pluto'}, 0),
+                ({'the moon', 'the sun'}, 3.0),
+                (tree.vertices, tree.weight),
+            ],
+        )
+    
+    def test_boruvkas_algorithm(self) -> None:
+        """Test the 'boruvka' engine of the `minimum_spanning_forest` method."""
+        rng = random.Random(2050)
+        g = Graph[int, int](range(300))
+        for _ in range(900):
+            # lots of ties, to make sure they don't make cycles
+            g.add_edge(rng.randrange(300), rng.randrange(300), rng.randrange(5))
+        g.add_vertex(300)
+        
+        def summary(forest: list[SpanningTree[int, int]]) -> list[tuple[int, int]]:
+            return sorted((min(tree.vertices), tree.weight) for tree in forest)
+        
+        expected = summary(g.minimum_spanning_forest())
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                forest = g.minimum_spanning_forest(engine='boruvka', workers=workers)
+                self.assertEqual(summary(forest), expected)
+                for tree in forest:
+                    self.assertEqual(len(tree.edges), len(tree.vertices) - 1)
+                    for u, v, weight in tree.edges:
+                        self.assertEqual(g.weight(u, v), weight)
+        
+        # snapshots have no interning table, so this can't rely on one
+        snapshot = g.snapshot()
+        g.remove_vertex(0)
+        forest = snapshot.minimum_spanning_forest(engine='boruvka', workers=1)
+        self.assertEqual(summary(forest), expected)
+        
+        (tree,) = self.g.minimum_spanning_forest(engine='boruvka', workers=1)
+        self.assertEqual(
+            tree.weight, sum(self.g.minimum_spanning_tree('my house')[1].values())
+        )
+        
+        # weights that can't be packed into an array fall back to Kruskal's
+        fractions_graph = Graph[str, fractions.Fraction](
+            ['a', 'b', 'c'],
+            [
+                (('a', 'b'), fractions.Fraction(1, 3)),
+                (('b', 'c'), fractions.Fraction(1, 6)),
+                (('a', 'c'), fractions.Fraction(1, 2)),
+            ],
+        )
+        (tree,) = fractions_graph.minimum_spanning_forest(engine='boruvka', workers=1)
+        self.assertEqual(tree.weight, fractions.Fraction(1, 2))
+        with self.assertRaises(ValueError):
+            self.g.minimum_spanning_forest(engine='prim') # pyright: ignore[reportArgumentType]
+        with self.assertRaises(ValueError):
+            self.g.minimum_spanning_forest(workers=2)
+    
     def test_dijkstras_algorithm(self) -> None:
         stolen_wikipedia_example = Graph(
             vertices = [1, 2, 3, 4, 5, 6],
@@ -168,6 +649,477 @@ class test_GraphTraversal(unittest.TestCase): # noqa: N801
             )
         )
     
+    def test_shortest_path_between(self) -> None:
+        """Test the `shortest_path_between` method of the `Graph` class."""
+        for bidirectional in (False, True):
+            with self.subTest(bidirectional=bidirectional):
+                self.assertEqual(
+                    self.g.shortest_path_between(
+                        'my house', 'ur dads office', bidirectional=bidirectional
+                    ),
+                    (['my house', 'ur moms house', 'the divorce court', 'ur dads office'], 3.5), # noqa: E501
+                )
+                self.assertEqual(
+                    self.g.shortest_path_between(
+                        'a cheap motel', 'a cheap motel', bidirectional=bidirectional
+                    ),
+                    (['a cheap motel'], 0),
+                )
+        
+        self.g.add_vertex('the moon')
+        self.assertEqual(self.g.shortest_path_between('my house', 'the moon'), ([], math.inf)) # noqa: E501
+        self.assertEqual(
+            self.g.shortest_path_between('the moon', 'my house', bidirectional=True),
+            ([], math.inf),
+        )
+        with self.assertRaises(ValueError):
+            self.g.shortest_path_between('my house', 'mars')
+    
+    def test_shortest_path_between_matches_dijkstra(self) -> None:
+        """Test that `shortest_path_between` agrees with `shortest_paths`."""
+        rng = random.Random(2050)
+        g = Graph[int, int](range(60))
+        for _ in range(150):
+            g.add_edge(rng.randrange(60), rng.randrange(60), rng.randrange(1, 20))
+        
+        _, distances = g.shortest_paths(0)
+        for goal in range(60):
+            for bidirectional in (False, True):
+                path, cost = g.shortest_path_between(
+                    0, goal, bidirectional=bidirectional
+                )
+                self.assertEqual(cost, distances[goal])
+                if path:
+                    self.assertEqual(path[0], 0)
+                    self.assertEqual(path[-1], goal)
+                    self.assertEqual(
+                        sum(g.weight(u, v) for u, v in itertools.pairwise(path)), cost
+                    )
+    
+    def test_a_star(self) -> None:
+        """Test the `a_star` method of the `Graph` class on a grid."""
+        size = 20
+        grid = Graph[tuple[int, int], int](
+            (x, y) for x in range(size) for y in range(size)
+        )
+        for x in range(size):
+            for y in range(size):
+                if x + 1 < size:
+                    grid.add_edge((x, y), (x + 1, y), 1)
+                if y + 1 < size:
+                    grid.add_edge((x, y), (x, y + 1), 1)
+        
+        start, goal = (0, 0), (size - 1, size - 1)
+        _, _, dijkstra_expanded = grid.a_star(start, goal, lambda v, goal: 0)
+        for heuristic in (manhattan_distance, euclidean_distance):
+            with self.subTest(heuristic=heuristic.__name__):
+                path, cost, expanded = grid.a_star(start, goal, heuristic)
+                self.assertEqual(cost, 2 * (size - 1))
+                self.assertEqual((path[0], path[-1]), (start, goal))
+                self.assertLessEqual(expanded, dijkstra_expanded)
+        
+        # manhattan distance is exact on a grid, so very little should be explored
+        _, _, expanded = grid.a_star(start, goal, manhattan_distance)
+        self.assertLess(expanded, dijkstra_expanded // 4)
+    
+    def test_all_pairs_shortest_paths(self) -> None:
+        """Test the `all_pairs_shortest_paths` method of the `Graph` class."""
+        expected = {v: self.g.shortest_paths(v) for v in self.g}
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                self.assertEqual(
+                    dict(self.g.all_pairs_shortest_paths(workers=workers)), expected
+                )
+        
+        sources = ['my house', 'ur dads office']
+        self.assertEqual(
+            dict(self.g.all_pairs_shortest_paths(sources, workers=2)),
+            {v: expected[v] for v in sources},
+        )
+        with self.assertRaises(ValueError):
+            self.g.all_pairs_shortest_paths(['mars'])
+    
+    def test_k_shortest_paths(self) -> None:
+        """Test the `k_shortest_paths` method of the `Graph` class."""
+        paths = self.g.k_shortest_paths('my house', 'ur dads office', 3)
+        self.assertEqual(
+            paths,
+            [
+                (['my house', 'ur moms house', 'the divorce court', 'ur dads office'], 3.5), # noqa: E501
+                (['my house', 'ur moms house', 'a cheap motel', 'the divorce court', 'ur dads office'], 5.0), # noqa: E501
+                (['my house', 'ur moms house', 'a cheap motel', 'ur dads office'], 5.5),
+            ],
+        )
+        all_paths = list(self.g.shortest_simple_paths('my house', 'ur dads office'))
+        self.assertEqual([cost for _, cost in all_paths], [3.5, 5.0, 5.5, 7.0])
+        self.assertEqual(
+            self.g.k_shortest_paths('my house', 'ur dads office', 10), all_paths
+        )
+        
+        lazy = self.g.shortest_simple_paths('ur dads office', 'my house')
+        self.assertEqual(next(lazy)[1], 3.5)
+        
+        self.g.add_vertex('the moon')
+        self.assertEqual(self.g.k_shortest_paths('my house', 'the moon', 3), [])
+        with self.assertRaises(ValueError):
+            self.g.k_shortest_paths('my house', 'mars', 3)
+    
+    def test_k_shortest_paths_random(self) -> None:
+        """Test that `k_shortest_paths` agrees with trying every simple path."""
+        def costs_from(g: Graph[int, int], path: list[int], cost: int) -> list[int]:
+            if path[-1] == 7:
+                return [cost]
+            return [
+                total
+                for u, weight in g.neighbors(path[-1]) if u not in path
+                for total in costs_from(g, [*path, u], cost + weight)
+            ]
+        
+        rng = random.Random(1312)
+        for _ in range(20):
+            g = Graph[int, int](range(8))
+            g.add_edges(
+                ((rng.randrange(8), rng.randrange(8)), rng.randrange(5))
+                for _ in range(14)
+            )
+            costs = sorted(costs_from(g, [0], 0))
+            for k in (1, 3, 10, len(costs) + 1):
+                paths = g.k_shortest_paths(0, 7, k)
+                self.assertEqual([cost for _, cost in paths], costs[:k])
+                self.assertEqual(len({tuple(path) for path, _ in paths}), len(paths))
+                for path, cost in paths:
+                    self.assertEqual(len(set(path)), len(path))
+                    self.assertEqual(
+                        sum(g.weight(u, v) for u, v in itertools.pairwise(path)), cost
+                    )
+    
+    def test_cache(self) -> None:
+        """Test that results are cached, and thrown away when the graph changes."""
+        self.assertIsNone(self.g.cache_info())
+        self.g.enable_cache(maxsize=2)
+        
+        first = self.g.shortest_paths('my house')
+        self.assertIs(self.g.shortest_paths('my house'), first)
+        self.assertIsNot(self.g.paths_with_fewest_edges('my house'), first)
+        self.assertEqual(self.g.cache_info(), (1, 2, 2, 2))
+        
+        # least recently used result gets evicted
+        self.assertIs(self.g.shortest_paths('my house'), first)
+        self.g.minimum_spanning_tree('my house')
+        self.assertIs(self.g.shortest_paths('my house'), first)
+        self.g.paths_with_fewest_edges('my house')
+        self.assertEqual(self.g.cache_info(), (3, 4, 2, 2))
+        
+        # adding a vertex that's already there doesn't change the graph
+        self.g.add_vertex('my house')
+        self.assertIs(self.g.shortest_paths('my house'), first)
+        
+        self.g.add_edge('my house', 'ur dads office', 0.5)
+        second = self.g.shortest_paths('my house')
+        self.assertIsNot(second, first)
+        self.assertEqual(second[1]['ur dads office'], 0.5)
+        self.assertEqual(self.g.cache_info().currsize, 1) # pyright: ignore[reportOptionalMemberAccess]
+        
+        self.g.remove_edge('my house', 'ur dads office')
+        self.assertEqual(self.g.shortest_paths('my house'), first)
+        
+        self.g.disable_cache()
+        self.assertIsNot(self.g.shortest_paths('my house'), self.g.shortest_paths('my house')) # noqa: E501
+    
+    def test_cache_keyword_start(self) -> None:
+        """Test that the cached algorithms take `start` as a keyword argument too."""
+        methods = [
+            self.g.paths_with_fewest_edges,
+            self.g.fewest_flights,
+            self.g.shortest_paths,
+            self.g.minimum_spanning_tree,
+        ]
+        for method in methods:
+            with self.subTest(method=method.__name__):
+                self.g.disable_cache()
+                expected = method('my house')
+                self.assertEqual(method(start='my house'), expected)
+                
+                # both ways of passing `start` share one cache entry
+                self.g.enable_cache()
+                first = method(start='my house')
+                self.assertEqual(first, expected)
+                self.assertIs(method('my house'), first)
+                self.assertEqual(self.g.cache_info(), (1, 1, 128, 1))
+        
+        self.assertIs(
+            self.g.shortest_paths('my house', 'heap'), self.g.shortest_paths('my house')
+        )
+    
+    def test_dynamic_shortest_paths(self) -> None:
+        """Test that `DynamicShortestPaths` stays in sync with `shortest_paths`."""
+        dsp = DynamicShortestPaths(self.g, 'my house')
+        self.assertEqual(dsp.distance('ur dads office'), 3.5)
+        
+        changed = dsp.add_edge('my house', 'ur dads office', 1.0)
+        self.assertEqual(changed, {'ur dads office', 'the divorce court'})
+        self.assertEqual(dsp.path('ur dads office'), ['my house', 'ur dads office'])
+        self.assertEqual(dsp.distance('the divorce court'), 1.5)
+        
+        dsp.remove_edge('my house', 'ur dads office')
+        self.assertEqual(dsp.distance('ur dads office'), 3.5)
+        self.assertEqual(dsp.distances, self.g.shortest_paths('my house')[1])
+        
+        dsp.remove_edge('my house', 'ur moms house')
+        self.assertEqual(dsp.distances, {'my house': 0})
+        self.assertEqual(dsp.path('ur moms house'), [])
+        
+        rng = random.Random(2050)
+        g = Graph[int, int](range(40))
+        for _ in range(80):
+            g.add_edge(rng.randrange(40), rng.randrange(40), rng.randrange(10))
+        dsp = DynamicShortestPaths(g, 0)
+        for _ in range(100):
+            u, v = rng.randrange(40), rng.randrange(40)
+            if (u, v) in g and rng.random() < 0.4:
+                dsp.remove_edge(u, v)
+            else:
+                dsp.add_edge(u, v, rng.randrange(10))
+            tree, distances = g.shortest_paths(0)
+            self.assertEqual(
+                dsp.distances, {v: d for v, d in distances.items() if d < math.inf}
+            )
+            self.assertEqual(dsp.tree.keys(), tree.keys())
+    
+    def test_dials_algorithm(self) -> None:
+        """Test the 'buckets' engine of the `shortest_paths` method."""
+        rng = random.Random(2050)
+        g = Graph[int, int](range(60))
+        for _ in range(150):
+            g.add_edge(rng.randrange(60), rng.randrange(60), rng.randrange(0, 20))
+        
+        _, expected = g.shortest_paths(0)
+        tree, distances = g.shortest_paths(0, engine='buckets')
+        self.assertEqual(distances, expected)
+        for v, u in tree.items():
+            self.assertEqual(distances[v], distances[u] + g.weight(u, v))
+        
+        # huge weights would mean walking through millions of empty buckets, so this
+        # falls back to the heap, which has to give the same answer
+        huge = Graph[int, int](range(3), [((0, 1), 3_000_000), ((1, 2), 1)])
+        self.assertEqual(
+            huge.shortest_paths(0, engine='buckets'), huge.shortest_paths(0)
+        )
+        
+        with self.assertRaises(ValueError):
+            self.g.shortest_paths('my house', engine='buckets')
+        with self.assertRaises(ValueError):
+            g.shortest_paths(0, engine='fibonacci') # pyright: ignore[reportArgumentType]
+    
+    def test_snapshot(self) -> None:
+        """Test that snapshots don't see changes made to the graph after them."""
+        tree, distances = self.g.shortest_paths('my house')
+        forest_weight = sum(tree.weight for tree in self.g.minimum_spanning_forest())
+        snapshot = self.g.snapshot()
+        
+        self.g.add_edge('my house', 'a cheap motel', 0.5)
+        self.g.remove_edge('ur moms house', 'the divorce court')
+        self.g.add_vertex('the moon')
+        self.g.add_edges([(('the moon', 'my house'), 100.0)])
+        self.g.remove_vertex('ur dads office')
+        
+        self.assertEqual(snapshot.shortest_paths('my house'), (tree, distances))
+        self.assertEqual(
+            sum(tree.weight for tree in snapshot.minimum_spanning_forest()),
+            forest_weight,
+        )
+        self.assertEqual(len(snapshot), 5)
+        self.assertIn(('ur moms house', 'the divorce court'), snapshot)
+        self.assertNotIn(('my house', 'a cheap motel'), snapshot)
+        self.assertNotIn('the moon', snapshot)
+        self.assertEqual(snapshot.weight('ur dads office', 'the divorce court'), 0.5)
+        
+        # and the graph itself did change
+        self.assertEqual(self.g.shortest_paths('my house')[1], {
+            'my house': 0,
+            'ur moms house': 1.5,
+            'a cheap motel': 0.5,
+            'the divorce court': 2.0,
+            'the moon': 100.0,
+        })
+        self.assertEqual(self.g.snapshot().freeze().thaw().shortest_paths('the moon'),
+                         self.g.shortest_paths('the moon'))
+        
+        with self.assertRaises(TypeError):
+            snapshot.add_edge('my house', 'ur dads office', 1.0)
+        with self.assertRaises(TypeError):
+            snapshot.remove_vertex('my house')
+    
+    def test_snapshot_threads(self) -> None:
+        """Test that readers never see half of a batch while a writer is running."""
+        g = Graph[int, int](range(100))
+        latest = [g.snapshot()]
+        bad: list[int] = []
+        done = threading.Event()
+        
+        def write() -> None:
+            # every batch adds a pair of edges, so whole batches have an even number
+            for i in range(0, 98, 2):
+                g.add_edges([((i, i + 1), 1), ((i + 1, i + 2), 1)])
+                latest[0] = g.snapshot()
+            done.set()
+        
+        def read() -> None:
+            while not done.is_set():
+                _, distances = latest[0].shortest_paths(0)
+                reachable = sum(1 for d in distances.values() if d < math.inf)
+                if reachable % 2 == 0:
+                    bad.append(reachable)
+        
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for thread in readers:
+            thread.start()
+        write()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(bad, [])
+        self.assertEqual(len(latest[0].shortest_paths(0)[0]), 98)
+    
+    def test_search_stats(self) -> None:
+        """Test that `shortest_paths` and `minimum_spanning_tree` fill in stats."""
+        num_edges = self.g.num_edges
+        self.g.enable_cache()
+        
+        stats = SearchStats()
+        self.assertEqual(
+            self.g.shortest_paths('my house', stats=stats),
+            self.g.shortest_paths('my house'),
+        )
+        self.assertEqual(stats.vertices_settled, 5)
+        self.assertEqual(stats.neighbors_calls, 5)
+        self.assertEqual(stats.edges_scanned, 2 * num_edges)
+        self.assertEqual(stats.heap_pushes, 5)
+        self.assertEqual(stats.heap_pops, 5)
+        self.assertEqual(stats.peak_heap_size, 5)
+        self.assertEqual(stats.heap_updates, stats.edges_relaxed)
+        self.assertEqual(set(stats.phase_seconds), {'initialize', 'search'})
+        
+        # stats skip the cache, and add on to what's already there
+        self.g.shortest_paths('my house', stats=stats)
+        self.assertEqual(stats.vertices_settled, 10)
+        
+        stats = SearchStats()
+        self.assertEqual(
+            self.g.minimum_spanning_tree('my house', stats=stats),
+            self.g.minimum_spanning_tree('my house'),
+        )
+        self.assertEqual(stats.vertices_settled, 5)
+        self.assertEqual(stats.edges_scanned, 2 * num_edges)
+        self.assertEqual(stats.heap_pushes, 2 * num_edges)
+        self.assertEqual(stats.heap_pops, 2 * num_edges)
+        self.assertEqual(stats.heap_updates, 0)
+        self.assertEqual(
+            set(stats.phase_seconds), {'initialize', 'search', 'weights'}
+        )
+        self.assertGreaterEqual(stats.total_seconds, 0)
+        
+        with self.assertRaises(ValueError):
+            self.g.shortest_paths('my house', engine='buckets', stats=SearchStats())
+    
+    def test_multi_source(self) -> None:
+        """Test the multi-source versions of BFS and Dijkstra's algorithm."""
+        sources = {'my house', 'ur dads office'}
+        self.g.add_vertex('the moon')
+        
+        prev, num_edges, nearest = self.g.multi_source_paths_with_fewest_edges(sources)
+        self.assertEqual(num_edges, {
+            'my house': 0,
+            'ur dads office': 0,
+            'ur moms house': 1,
+            'a cheap motel': 1,
+            'the divorce court': 1,
+        })
+        self.assertEqual(nearest['ur moms house'], 'my house')
+        self.assertEqual(nearest['the divorce court'], 'ur dads office')
+        self.assertEqual(prev['a cheap motel'], 'ur dads office')
+        
+        tree, distances, nearest = self.g.multi_source_shortest_paths(sources)
+        self.assertEqual(distances, {
+            'my house': 0,
+            'ur dads office': 0,
+            'ur moms house': 1.5,
+            'a cheap motel': 2.0,
+            'the divorce court': 0.5,
+        })
+        self.assertEqual(nearest['ur moms house'], 'ur dads office')
+        self.assertEqual(nearest['a cheap motel'], 'ur dads office')
+        self.assertEqual(tree['a cheap motel'], 'the divorce court')
+        self.assertNotIn('my house', tree)
+        
+        with self.assertRaises(ValueError):
+            self.g.multi_source_shortest_paths([])
+        with self.assertRaises(ValueError):
+            self.g.multi_source_paths_with_fewest_edges(['mars'])
+    
+    def test_within_distance(self) -> None:
+        """Test the `within_distance` method of the `Graph` class."""
+        self.assertEqual(
+            list(self.g.within_distance('ur dads office', 1.5)),
+            [('ur dads office', 0), ('the divorce court', 0.5), ('ur moms house', 1.5)],
+        )
+        self.assertEqual(
+            dict(self.g.within_distance('my house', math.inf)),
+            self.g.shortest_paths('my house')[1],
+        )
+        self.assertEqual(list(self.g.within_distance('my house', -1)), [])
+        
+        lazy = self.g.within_distance('my house', 10)
+        self.assertEqual(next(lazy), ('my house', 0))
+        with self.assertRaises(ValueError):
+            self.g.within_distance('mars', 1)
+    
+    def test_k_hop(self) -> None:
+        """Test the `k_hop` method of the `Graph` class."""
+        self.assertEqual(list(self.g.k_hop('my house', 0)), [('my house', 0)])
+        self.assertEqual(
+            list(self.g.k_hop('my house', 1)), [('my house', 0), ('ur moms house', 1)]
+        )
+        self.assertEqual(
+            dict(self.g.k_hop('my house', 2)),
+            {
+                'my house': 0,
+                'ur moms house': 1,
+                'a cheap motel': 2,
+                'the divorce court': 2,
+            },
+        )
+        self.assertEqual(
+            dict(self.g.k_hop('my house', 100)),
+            self.g.paths_with_fewest_edges('my house')[1],
+        )
+        with self.assertRaises(ValueError):
+            self.g.k_hop('mars', 1)
+    
+    def test_fewest_edges_path(self) -> None:
+        """Test the `fewest_edges_path` method of the `Graph` class."""
+        self.assertEqual(
+            self.g.fewest_edges_path('my house', 'ur dads office'),
+            ['my house', 'ur moms house', 'the divorce court', 'ur dads office'],
+        )
+        self.assertEqual(self.g.fewest_edges_path('my house', 'my house'), ['my house'])
+        
+        rng = random.Random(2050)
+        g = Graph[int, int](range(300))
+        g.add_edges(((rng.randrange(300), rng.randrange(300)), 1) for _ in range(400))
+        _, num_edges = g.paths_with_fewest_edges(0)
+        for goal in range(300):
+            path = g.fewest_edges_path(0, goal)
+            if goal not in num_edges:
+                self.assertEqual(path, [])
+                continue
+            self.assertEqual(len(path) - 1, num_edges[goal])
+            self.assertEqual((path[0], path[-1]), (0, goal))
+            for u, v in itertools.pairwise(path):
+                self.assertIn((u, v), g)
+        
+        with self.assertRaises(ValueError):
+            self.g.fewest_edges_path('my house', 'mars')
+    
     # TODO: Which alg do you use here, and why?
     # Alg: Breadth-first search
     # Why: Simple unweighted graph traversal algorithm
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import unittest
+import urllib.parse
+
+from Graph import Graph
+from RouteServer import RouteServer, fetch, load_test
+
+
+def make_graph() -> Graph[str, float]:
+    # my house --2.0-- ur moms house --1.0-- a cheap motel
+    #                        |                    |
+    #                       1.0                  1.5
+    #                        |                    |
+    #                the divorce court ------------
+    return Graph[str, float](
+        ['my house', 'ur moms house', 'a cheap motel', 'the divorce court', 'the moon'],
+        [
+            (('my house', 'ur moms house'), 2.0),
+            (('ur moms house', 'a cheap motel'), 1.0),
+            (('ur moms house', 'the divorce court'), 1.0),
+            (('a cheap motel', 'the divorce court'), 1.5),
+        ],
+    )
+
+class test_RouteServer(unittest.IsolatedAsyncioTestCase): # noqa: N801
+    async def asyncSetUp(self) -> None:
+        """Start a server `self.server` with one worker thread, and connect to it."""
+        self.server = RouteServer(make_graph(), workers=1) # pyright: ignore[reportUninitializedInstanceVariable]
+        host, port = await self.server.start()
+        self.connection = await asyncio.open_connection(host, port) # pyright: ignore[reportUninitializedInstanceVariable]
+
+    async def asyncTearDown(self) -> None:
+        self.connection[1].close()
+        await self.server.close()
+
+    async def test_route(self) -> None:
+        """Test asking for a route over HTTP."""
+        status, body = await fetch(
+            *self.connection, '/route?source=my+house&target=a+cheap+motel'
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(body['distance'], 3.0)
+        self.assertEqual(body['path'], ['my house', 'ur moms house', 'a cheap motel'])
+
+        status, body = await fetch(*self.connection, '/distances?source=the+moon')
+        self.assertEqual(status, 200)
+        self.assertEqual(body['distances'], {'the moon': 0})
+
+    async def test_errors(self) -> None:
+        """Test that bad requests get errors, without breaking the connection."""
+        for path, expected in [
+            ('/route?source=my+house', 400),
+            ('/route?source=my+house&target=mars', 404),
+            ('/route?source=my+house&target=the+moon', 404),
+            ('/nowhere', 404),
+        ]:
+            with self.subTest(path=path):
+                status, body = await fetch(*self.connection, path)
+                self.assertEqual(status, expected)
+                self.assertIn('error', body)
+        status, _ = await fetch(*self.connection, '/stats')
+        self.assertEqual(status, 200)
+
+    async def test_internal_error(self) -> None:
+        """Test that unexpected errors get a 500, without breaking the connection."""
+        def broken(name: str) -> str:
+            raise KeyError(name)
+
+        async with RouteServer(make_graph(), vertex_type=broken, workers=1) as server:
+            reader, writer = await asyncio.open_connection(*server.address)
+            status, body = await fetch(reader, writer, '/distances?source=my+house')
+            self.assertEqual(status, 500)
+            self.assertIn('KeyError', body['error'])
+            status, _ = await fetch(reader, writer, '/stats')
+            self.assertEqual(status, 200)
+            writer.close()
+
+    async def test_coalescing(self) -> None:
+        """Test that concurrent requests from the same source share one search."""
+        results = await asyncio.gather(
+            *(self.server.shortest_paths('my house') for _ in range(20)),
+            self.server.shortest_paths('the moon'),
+        )
+        self.assertTrue(all(result is results[0] for result in results[:20]))
+        self.assertEqual(self.server.stats()['computations'], 2)
+        self.assertEqual(self.server.stats()['coalesced'], 19)
+
+        # and finished searches get reused
+        await self.server.shortest_paths('my house')
+        self.assertEqual(self.server.stats()['computations'], 2)
+        self.assertEqual(self.server.stats()['cache_hits'], 1)
+
+        with self.assertRaises(ValueError):
+            await self.server.shortest_paths('mars')
+
+    async def test_tuple_vertices(self) -> None:
+        """Test that vertices which are pairs aren't mistaken for edges."""
+        def parse_point(text: str) -> tuple[int, int]:
+            x, y = text.split(',')
+            return int(x), int(y)
+
+        grid = Graph[tuple[int, int], int](
+            [(0, 0), (0, 1), (1, 1)],
+            [(((0, 0), (0, 1)), 1), (((0, 1), (1, 1)), 2)],
+        )
+        async with RouteServer(grid, vertex_type=parse_point, workers=1) as server:
+            tree, distances = await server.shortest_paths((0, 0))
+            self.assertEqual(distances[(1, 1)], 3)
+            self.assertEqual(tree[(1, 1)], (0, 1))
+            with self.assertRaises(ValueError):
+                await server.shortest_paths((1, 0))
+
+            reader, writer = await asyncio.open_connection(*server.address)
+            status, body = await fetch(reader, writer, '/route?source=0,0&target=1,1')
+            self.assertEqual(status, 200)
+            self.assertEqual(body['path'], [[0, 0], [0, 1], [1, 1]])
+            status, _ = await fetch(reader, writer, '/route?source=0,0&target=1,0')
+            self.assertEqual(status, 404)
+            writer.close()
+
+    async def test_close_doesnt_block(self) -> None:
+        """Test that closing waits for running searches without blocking the loop."""
+        release = threading.Event()
+        fallback = threading.Timer(5, release.set) # so a failure can't hang forever
+        fallback.start()
+        executor = self.server._executor # pyright: ignore[reportPrivateUsage]
+        busy = asyncio.get_running_loop().run_in_executor(executor, release.wait)
+        closing = asyncio.ensure_future(self.server.close())
+        await asyncio.sleep(0.05)
+        self.assertFalse(release.is_set())
+        self.assertFalse(closing.done())
+        release.set()
+        await closing
+        fallback.cancel()
+        self.assertTrue(await busy)
+
+    async def test_load_test(self) -> None:
+        """Test the load test client against the server."""
+        host, port = self.server.address
+        paths = [
+            f'/route?source=my+house&target={urllib.parse.quote_plus(v)}'
+            for v in make_graph()
+        ] * 10
+        report = await load_test(host, port, paths, concurrency=8)
+        self.assertEqual(report['requests'], len(paths))
+        self.assertEqual(report['errors'], 10) # the moon is unreachable
+        self.assertLessEqual(report['p50_ms'], report['p99_ms'])
+        self.assertGreater(report['throughput'], 0)
+
+class test_RouteServerProcesses(unittest.IsolatedAsyncioTestCase): # noqa: N801
+    async def test_process_pool(self) -> None:
+        """Test that searches work in worker processes too."""
+        async with RouteServer(make_graph(), workers=2) as server:
+            tree, distances = await server.shortest_paths('my house')
+            self.assertEqual(distances['the divorce court'], 3.0)
+            self.assertEqual(tree['a cheap motel'], 'ur moms house')
+
+if __name__ == '__main__':
+    unittest.main()
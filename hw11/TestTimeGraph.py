@@ -0,0 +1,56 @@
+import io
+import json
+import random
+import unittest
+from contextlib import redirect_stdout
+
+from TimeGraph import GENERATORS, benchmark, main
+
+
+class test_Generators(unittest.TestCase): # noqa: N801
+    def test_seeded(self) -> None:
+        """Test that each generator gives the same graph for the same seed."""
+        for name, generator in GENERATORS.items():
+            with self.subTest(generator=name):
+                self.assertEqual(
+                    generator(500, random.Random(1)), generator(500, random.Random(1))
+                )
+
+    def test_sizes(self) -> None:
+        """Test that each generator gives about the right number of vertices."""
+        for name, generator in GENERATORS.items():
+            with self.subTest(generator=name):
+                vertices, edges = generator(1000, random.Random(1))
+                self.assertAlmostEqual(len(vertices), 1000, delta=100)
+                self.assertGreater(len(edges), 0)
+                for (u, v), weight in edges:
+                    self.assertIn(u, vertices)
+                    self.assertIn(v, vertices)
+                    self.assertGreaterEqual(weight, 1)
+
+class test_Benchmark(unittest.TestCase): # noqa: N801
+    def test_benchmark(self) -> None:
+        """Test that a benchmark has a record for each operation."""
+        records = benchmark('grid', 100, trials=1)
+        self.assertEqual(
+            [record['operation'] for record in records],
+            ['construct', 'neighbors', 'bfs', 'dijkstra', 'prim'],
+        )
+        for record in records:
+            self.assertEqual(record['vertices'], 100)
+            self.assertEqual(record['edges'], 180)
+            self.assertGreaterEqual(record['seconds'], 0)
+
+    def test_main(self) -> None:
+        """Test that running the script prints valid JSON."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main([
+                '--generators', 'erdos_renyi', '--sizes', '50', '100', '--trials', '1'
+            ])
+        report = json.loads(output.getvalue())
+        self.assertEqual(len(report['results']), 10)
+        self.assertEqual({r['generator'] for r in report['results']}, {'erdos_renyi'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""Benchmarks for the graph algorithms in Graph.py, on seeded synthetic graphs.
+
+Run this as a script to time building a graph, scanning every vertex's neighbors,
+BFS, Dijkstra, and Prim, on a few kinds of random graphs of a few sizes, and print
+the results as JSON (or write them to a file with `--output`), so that runs from
+different commits can be compared.
+
+    python TimeGraph.py --sizes 1000 10000 --output before.json
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import typing
+
+from Graph import Graph
+from GraphGenerators import GENERATORS
+
+if typing.TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+_T = typing.TypeVar('_T')
+
+def time_f(func: Callable[[], _T], trials: int) -> tuple[float, _T]:
+    """Return the fastest time out of `trials` runs of `func`, and its result."""
+    start = time.perf_counter()
+    result = func()
+    best = time.perf_counter() - start
+    for _ in range(trials - 1):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def scan_neighbors(g: Graph[int, int]) -> int:
+    """Look at every neighbor of every vertex, and return how many there were."""
+    return sum(1 for v in g for _ in g.neighbors(v))
+
+def benchmark(
+    generator: str,
+    n: int,
+    *,
+    seed: int = 2050,
+    trials: int = 3
+) -> list[dict[str, typing.Any]]:
+    """Time each operation on one generated graph, and return a record for each."""
+    vertices, edges = GENERATORS[generator](n, random.Random(seed))
+    build_time, g = time_f(lambda: Graph[int, int](vertices, edges), trials)
+    start = 0
+
+    timings = {
+        'construct': build_time,
+        'neighbors': time_f(lambda: scan_neighbors(g), trials)[0],
+        'bfs': time_f(lambda: g.paths_with_fewest_edges(start), trials)[0],
+        'dijkstra': time_f(lambda: g.shortest_paths(start), trials)[0],
+        'prim': time_f(lambda: g.minimum_spanning_tree(start), trials)[0],
+    }
+    return [
+        {
+            'generator': generator,
+            'seed': seed,
+            'vertices': len(g),
+            'edges': g.num_edges,
+            'operation': operation,
+            'seconds': seconds,
+        }
+        for operation, seconds in timings.items()
+    ]
+
+def _current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], # noqa: S607
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(
+    generators: Sequence[str],
+    sizes: Sequence[int],
+    *,
+    seed: int = 2050,
+    trials: int = 3
+) -> dict[str, typing.Any]:
+    """Run every benchmark, and return the results along with where they came from."""
+    results: list[dict[str, typing.Any]] = []
+    for generator in generators:
+        for n in sizes:
+            results.extend(benchmark(generator, n, seed=seed, trials=trials))
+    return {
+        'commit': _current_commit(),
+        'date': dt.datetime.now(dt.UTC).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'trials': trials,
+        'results': results,
+    }
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").partition("\n")[0])
+    parser.add_argument(
+        '--generators', nargs='+',
+        choices=sorted(GENERATORS), default=sorted(GENERATORS),
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=[1_000, 10_000, 100_000],
+        help="numbers of vertices to try (up to 1,000,000 is reasonable)",
+    )
+    parser.add_argument('--seed', type=int, default=2050)
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--output', help="file to write the JSON to, instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(args.generators, args.sizes, seed=args.seed, trials=args.trials)
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    main()